@@ -0,0 +1,298 @@
+"""
+Load test the booking path with concurrent clients and report throughput, latency percentiles, lock waits and conflicts.
+
+    python -m benchmarks.loadtest --clients 16 --duration 30 --mix add_event=20,events_for_day=50,available_slots=30
+    python -m benchmarks.loadtest --url postgresql+psycopg://localhost/booking_load --clients 32
+    python -m benchmarks.loadtest --mix add_event=1 --group-commit --synchronous FULL
+
+Every client is a thread with its own session on an engine from database.make_engine, picking operations at random
+in the given ratios against a database seeded by benchmarks.synthetic (a temporary SQLite file by default). A database
+that already has executors is used as it is. Bookings go through reserve_event; cancellations and moves lock
+their event first (BEGIN IMMEDIATE on SQLite, SELECT ... FOR UPDATE elsewhere), which is what lock waits measure.
+Conflicts are reservations refused with SlotConflictError, errors are operations the database failed, e.g. on a
+lock timeout. With --group-commit bookings go through a batching.BookingQueue instead, whose lock waits happen in its
+writer thread and are left out.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time as clock
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from sqlalchemy import Engine, event, func, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from benchmarks.run import write_report
+from benchmarks.synthetic import ScheduleConfig, random_slot, seed
+from src.batching import BookingQueue
+from src.database import init_db, make_engine, make_session_factory
+from src.models import Base, Event, Executor, User
+from src.service import EventService, SlotConflictError
+
+OPERATIONS = ["add_event", "cancel_event", "move_event", "events_for_day", "available_slots"]
+DEFAULT_MIX = "events_for_day=40,available_slots=30,add_event=20,move_event=5,cancel_event=5"
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name.strip()!r}, expected one of {', '.join(OPERATIONS)}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+class LockWaits:
+    """
+    Time spent in the statements that take a write lock, per thread: BEGIN IMMEDIATE and SELECT ... FOR UPDATE.
+    """
+
+    def __init__(self, engine: Engine):
+        self.local = threading.local()
+        event.listen(engine, "before_cursor_execute", self.before)
+        event.listen(engine, "after_cursor_execute", self.after)
+
+    @staticmethod
+    def takes_lock(statement: str) -> bool:
+        return statement.startswith("BEGIN IMMEDIATE") or statement.rstrip().endswith("FOR UPDATE")
+
+    def before(self, conn, cursor, statement, parameters, context, executemany):
+        if self.takes_lock(statement):
+            conn.info["lock_started"] = clock.perf_counter()
+
+    def after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("lock_started", None)
+        if started is not None:
+            self.local.waited = getattr(self.local, "waited", 0.0) + clock.perf_counter() - started
+
+    def take(self) -> float:
+        waited, self.local.waited = getattr(self.local, "waited", 0.0), 0.0
+        return waited
+
+
+class Client:
+    """
+    One simulated client: a session, a random source and the operations it runs. Every operation ends its
+    transaction, and returns "ok", "conflict" or "miss" when the event it picked was gone or cancelled.
+    """
+
+    def __init__(
+            self,
+            db: Session,
+            rng: random.Random,
+            config: ScheduleConfig,
+            executors,
+            users,
+            last_event_id,
+            bookings: BookingQueue | None = None,
+    ):
+        self.db = db
+        self.bookings = bookings
+        self.service = EventService(db)
+        self.rng = rng
+        self.config = config
+        self.executors = executors
+        self.users = users
+        self.last_event_id = last_event_id
+
+    def day(self):
+        return self.config.first_day + timedelta(days=self.rng.randrange(self.config.days))
+
+    def locked_event(self) -> Event | None:
+        self.db.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+        found = self.db.get(Event, self.rng.randint(1, self.last_event_id), with_for_update=True)
+        if found is None or found.cancelled:
+            self.db.rollback()
+            return None
+        return found
+
+    def events_for_day(self) -> str:
+        self.service.events_for_day(self.day(), self.rng.choice(self.executors))
+        self.db.rollback()
+        return "ok"
+
+    def available_slots(self) -> str:
+        start = datetime.combine(self.day(), time(8))
+        self.service.available_slots(
+            self.rng.choice(self.executors), start, start + timedelta(hours=12), timedelta(minutes=30)
+        )
+        self.db.rollback()
+        return "ok"
+
+    def add_event(self) -> str:
+        day, start_time, end_time = random_slot(self.rng, self.config)
+        book = self.bookings.add_event if self.bookings else self.service.reserve_event
+        try:
+            book(self.rng.choice(self.users), self.rng.choice(self.executors), "lesson", start_time, end_time, day)
+        except SlotConflictError:
+            return "conflict"
+        return "ok"
+
+    def cancel_event(self) -> str:
+        found = self.locked_event()
+        if found is None:
+            return "miss"
+        self.service.cancel_event(found)
+        self.db.commit()
+        return "ok"
+
+    def move_event(self) -> str:
+        found = self.locked_event()
+        if found is None:
+            return "miss"
+        _, start_time, end_time = random_slot(self.rng, self.config)
+        self.service.move_event(found, new_st=start_time, new_et=end_time)
+        self.db.commit()
+        return "ok"
+
+
+def reset_sequences(engine: Engine):
+    """
+    Seeding inserts explicit ids, move PostgreSQL's id sequences past them so new rows don't collide.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"coalesce((SELECT max(id) FROM {table.name}), 0) + 1, false)"
+            ))
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+    return {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "max_ms": max(samples) * 1000}
+
+
+def load_test(args: argparse.Namespace, url: str) -> dict:
+    """
+    Seed the database at url if it's empty, run the clients for args.duration and return the report.
+    """
+    mix = parse_mix(args.mix)
+    config = ScheduleConfig.scaled(args.events, days=args.days, seed=args.seed)
+    engine = make_engine(
+        url, pool_size=args.clients, busy_timeout=args.busy_timeout, synchronous=args.synchronous
+    )
+    init_db(engine)
+    sessions = make_session_factory(engine)
+
+    with sessions() as db:
+        seeded = db.scalar(select(func.count(Executor.id))) == 0
+        if seeded:
+            seed(db, config)
+    if seeded:
+        reset_sequences(engine)
+    with sessions() as db:
+        executors = db.query(Executor).all()
+        users = db.query(User).all()
+        last_event_id = db.scalar(select(func.max(Event.id))) or 1
+
+    lock_waits = LockWaits(engine)
+    samples = defaultdict(list)
+    outcomes = defaultdict(lambda: defaultdict(int))
+    waits = defaultdict(float)
+    merge = threading.Lock()
+    names, weights = list(mix), list(mix.values())
+    bookings = BookingQueue(sessions, args.batch_size, args.batch_wait_ms / 1000) if args.group_commit else None
+    deadline = clock.perf_counter() + args.duration
+
+    def run(index: int):
+        rng = random.Random(args.seed * 1000 + index)
+        own = [], []
+        with sessions() as db:
+            client = Client(db, rng, config, executors, users, last_event_id, bookings)
+            while clock.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                started = clock.perf_counter()
+                try:
+                    outcome = getattr(client, name)()
+                except DBAPIError:
+                    db.rollback()
+                    outcome = "error"
+                own[0].append((name, clock.perf_counter() - started, outcome))
+                own[1].append(lock_waits.take())
+        with merge:
+            for (name, elapsed, outcome), waited in zip(*own):
+                samples[name].append(elapsed)
+                outcomes[name][outcome] += 1
+                waits[name] += waited
+
+    threads = [threading.Thread(target=run, args=(i,), name=f"client-{i}") for i in range(args.clients)]
+    started = clock.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = clock.perf_counter() - started
+    if bookings:
+        bookings.close()
+    engine.dispose()
+
+    total = sum(len(found) for found in samples.values())
+    attempts = sum(outcomes["add_event"].values())
+    results = {
+        name: {
+            "count": len(samples[name]),
+            "outcomes": dict(outcomes[name]),
+            "ops_per_second": len(samples[name]) / elapsed,
+            **percentiles(samples[name]),
+            "lock_wait_ms_mean": waits[name] / len(samples[name]) * 1000,
+        }
+        for name in names if samples[name]
+    }
+    return {
+        "backend": engine.dialect.name,
+        "config": {
+            "clients": args.clients, "duration": args.duration, "mix": mix, "seeded": seeded,
+            "synchronous": args.synchronous, "group_commit": args.group_commit,
+            "batch_size": args.batch_size, "batch_wait_ms": args.batch_wait_ms,
+            "schedule": {k: str(v) if k == "first_day" else v for k, v in vars(config).items()},
+        },
+        "results": {
+            "seconds": elapsed,
+            "operations": total,
+            "ops_per_second": total / elapsed,
+            "lock_wait_seconds": sum(waits.values()),
+            # Share of all client time spent waiting for write locks
+            "lock_wait_share": sum(waits.values()) / (elapsed * args.clients),
+            "conflict_rate": outcomes["add_event"]["conflict"] / attempts if attempts else None,
+            "error_rate": sum(found["error"] for found in outcomes.values()) / total if total else None,
+            "operations_by_name": results,
+        },
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="database URL, a temporary SQLite file by default")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation=weight pairs, comma separated")
+    parser.add_argument("--events", type=int, default=10_000, help="one-off events to seed an empty database with")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--busy-timeout", type=int, default=5_000, help="SQLite busy timeout in milliseconds")
+    parser.add_argument("--synchronous", default="NORMAL", help="SQLite synchronous pragma, FULL syncs every commit")
+    parser.add_argument("--group-commit", action="store_true", help="book through a BookingQueue")
+    parser.add_argument("--batch-size", type=int, default=256, help="largest BookingQueue batch")
+    parser.add_argument("--batch-wait-ms", type=float, default=5, help="how long a BookingQueue gathers a batch")
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    # The temporary database is deleted on exit, a --url database is kept
+    with tempfile.TemporaryDirectory(prefix="booking-load-") as directory:
+        report = load_test(args, args.url or f"sqlite:///{os.path.join(directory, 'load.sqlite')}")
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Time batch availability for every executor over a long horizon, serially and over process pools of growing size.
+
+    python -m benchmarks.parallel --events 100000 --horizon-days 180 --output parallel.json
+"""
+import argparse
+import os
+import tempfile
+import time as clock
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks.run import write_report
+from benchmarks.synthetic import ScheduleConfig, seed
+from src.models import Base, Executor
+from src.service import EventService
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000, help="one-off events, other tables scale with it")
+    parser.add_argument("--horizon-days", type=int, default=180)
+    parser.add_argument("--slot-minutes", type=int, default=15)
+    parser.add_argument("--workers", type=int, nargs="*", help="pool sizes, powers of two up to all cores by default")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    config = ScheduleConfig.scaled(args.events, days=args.horizon_days)
+
+    cores = os.cpu_count() or 1
+    sizes = args.workers or sorted({min(2 ** i, cores) for i in range(cores.bit_length() + 1)})
+    start = datetime.combine(config.first_day, time.min)
+    end = start + timedelta(days=args.horizon_days)
+    slot_size = timedelta(minutes=args.slot_minutes)
+
+    def best_of(operation) -> tuple[float, dict]:
+        timings, result = [], None
+        for _ in range(args.repeat):
+            started = clock.perf_counter()
+            result = operation()
+            timings.append(clock.perf_counter() - started)
+        return min(timings), result
+
+    with tempfile.TemporaryDirectory(prefix="booking-parallel-") as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.sqlite')}")
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            seed(db, config)
+
+        with Session(engine) as db:
+            service = EventService(db)
+            executors = db.query(Executor).all()
+            serial_seconds, expected = best_of(lambda: service.available_slots_many(executors, start, end, slot_size))
+            results = {"serial": {"seconds": serial_seconds}}
+            for workers in sizes:
+                with ProcessPoolExecutor(workers) as pool:
+                    # Start the workers before timing
+                    list(pool.map(abs, range(workers)))
+                    seconds, slots = best_of(lambda: service.available_slots_parallel(
+                        executors, start, end, slot_size, workers=workers, pool=pool
+                    ))
+                assert slots == expected, f"{workers} workers disagree with the serial path"
+                results[f"workers_{workers}"] = {"seconds": seconds, "speedup": serial_seconds / seconds}
+        engine.dispose()
+
+    report = {
+        "cpu_count": cores,
+        "config": {k: str(v) if k == "first_day" else v for k, v in vars(config).items()},
+        "executors": len(executors),
+        "slots_per_executor": (end - start) // slot_size,
+        "results": results,
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Time the EventService hot paths against a synthetic SQLite schedule and print the results as JSON.
+
+    python -m benchmarks.run --events 100000 --repeat 200 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time as clock
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from benchmarks.synthetic import ScheduleConfig, random_slot, seed
+from src.models import Base, Event, Executor, User
+from src.service import EventService
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(report: dict, output: str | None = None):
+    """Prefix the report with where it was measured and write it as JSON to the output file, or stdout."""
+    report = {
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        **report,
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def timed(db: Session, repeat: int, operation) -> dict:
+    """Runs operation repeat times, each in its own rolled back transaction, and summarizes the wall times."""
+    samples = []
+    for _ in range(repeat):
+        started = clock.perf_counter()
+        operation()
+        samples.append(clock.perf_counter() - started)
+        db.rollback()
+    samples.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": samples[0] * 1000,
+        "median_ms": statistics.median(samples) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def hot_paths(db: Session, config: ScheduleConfig, rng: random.Random):
+    service = EventService(db)
+    event_count = db.scalar(select(func.max(Event.id)))
+
+    def executor():
+        return db.get(Executor, rng.randint(1, config.executors))
+
+    def day():
+        return config.first_day + timedelta(days=rng.randrange(config.days))
+
+    def events_for_day():
+        service.events_for_day(day(), executor())
+
+    def events_for_period():
+        start = datetime.combine(day(), time.min)
+        service.events_for_period(start, start + timedelta(days=7), executor())
+
+    def available_slots():
+        start = datetime.combine(day(), time(8))
+        service.available_slots(executor(), start, start + timedelta(hours=12), timedelta(minutes=30))
+
+    def add_event():
+        slot_day, start_time, end_time = random_slot(rng, config)
+        try:
+            service.add_event(
+                db.get(User, rng.randint(1, config.users)), executor(), "lesson", start_time, end_time, slot_day
+            )
+            db.flush()
+        except ValueError:
+            pass
+
+    def move_event():
+        event = db.get(Event, rng.randint(1, event_count))
+        _, start_time, end_time = random_slot(rng, config)
+        service.move_event(event, new_st=start_time, new_et=end_time)
+        db.flush()
+
+    return {
+        "events_for_day": events_for_day,
+        "events_for_period": events_for_period,
+        "available_slots": available_slots,
+        "add_event": add_event,
+        "move_event": move_event,
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=10_000, help="one-off events, other tables scale with it")
+    parser.add_argument("--executors", type=int)
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--recurrent-events", type=int)
+    parser.add_argument("--breaks", type=int)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--only", nargs="*", help="names of the operations to time")
+    parser.add_argument("--db", help="SQLite file to seed, a temporary one by default")
+    parser.add_argument("--reset", action="store_true", help="drop the tables of a non-empty --db before seeding")
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    overrides = {
+        name: getattr(args, name)
+        for name in ("executors", "users", "recurrent_events", "breaks", "days", "seed")
+        if getattr(args, name) is not None
+    }
+    config = ScheduleConfig.scaled(args.events, **overrides)
+
+    if args.db and os.path.exists(args.db) and os.path.getsize(args.db) > 0 and not args.reset:
+        parser.error(f"{args.db} is not empty, pass --reset to drop its tables and seed it again")
+    # The temporary database is deleted on exit, a --db is kept
+    with tempfile.TemporaryDirectory(prefix="booking-bench-") as directory:
+        path = args.db or os.path.join(directory, "bench.sqlite")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+
+        started = clock.perf_counter()
+        with Session(engine) as db:
+            seed(db, config)
+        seed_seconds = clock.perf_counter() - started
+
+        results = {}
+        rng = random.Random(config.seed)
+        with Session(engine) as db:
+            for name, operation in hot_paths(db, config, rng).items():
+                if args.only and name not in args.only:
+                    continue
+                results[name] = timed(db, args.repeat, operation)
+        engine.dispose()
+
+    report = {
+        "config": {k: str(v) if k == "first_day" else v for k, v in vars(config).items()},
+        "seed_seconds": seed_seconds,
+        "results": results,
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Measure reservation throughput against 1, 2, 4... SQLite shards, with one writer thread per executor.
+
+    python -m benchmarks.sharding --shards 1 2 4 8 --executors 8 --bookings 200 --output sharding.json
+
+Every reservation takes its shard's write lock, so with one file all writers queue up behind each other,
+and with N shards up to N of them commit at once.
+"""
+import argparse
+import tempfile
+import threading
+import time as clock
+from datetime import date, time, timedelta
+
+from benchmarks.run import write_report
+from src.sharding import ShardRouter, ShardedEventService
+
+
+def run(directory: str, shards: int, executors: int, bookings: int, synchronous: str) -> dict:
+    router = ShardRouter.sqlite_files(directory, shards, synchronous=synchronous, busy_timeout=60_000)
+    router.init_db()
+    service = ShardedEventService(router)
+    user = router.new_user("Load", "student")
+    owners = [router.new_executor() for _ in range(executors)]
+
+    def book(executor):
+        for i in range(bookings):
+            day = date.today() + timedelta(days=i // 8)
+            service.reserve_event(user, executor, "Lesson", time(9 + i % 8), time(9 + i % 8, 45), day)
+
+    threads = [threading.Thread(target=book, args=(executor,)) for executor in owners]
+    started = clock.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = clock.perf_counter() - started
+    router.close()
+    return {"seconds": seconds, "bookings_per_second": executors * bookings / seconds}
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shards", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--executors", type=int, default=8, help="writer threads, one executor each")
+    parser.add_argument("--bookings", type=int, default=200, help="reservations per executor")
+    parser.add_argument("--synchronous", default="FULL", help="SQLite synchronous pragma, FULL syncs every commit")
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for shards in args.shards:
+        with tempfile.TemporaryDirectory(prefix=f"booking-shards-{shards}-") as directory:
+            results[f"shards_{shards}"] = run(directory, shards, args.executors, args.bookings, args.synchronous)
+    baseline = results[f"shards_{args.shards[0]}"]["bookings_per_second"]
+    for result in results.values():
+        result["speedup"] = result["bookings_per_second"] / baseline
+
+    report = {
+        "config": vars(args) | {"output": None},
+        "results": results,
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measure how long a fresh process takes from import to its first query, on a cold and on a warm database.
+
+    python -m benchmarks.startup --repeat 20 --output startup.json
+
+Every sample is a new interpreter, so module imports, engine creation and schema setup are paid like on a
+worker start. A cold start runs on a new SQLite file and sets the schema up, a warm start reuses a file
+whose schema is current.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time as clock
+
+from benchmarks.run import write_report
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child process, prints the phase timestamps relative to the first line
+PROBE = """
+import time
+started = time.perf_counter()
+import json
+from sqlalchemy import select
+from src import database
+from src.models import Executor
+from src.service import EventService
+imported = time.perf_counter()
+created = database.init_db()
+initialized = time.perf_counter()
+with database.get_session_factory()() as db:
+    EventService(db)
+    db.execute(select(Executor.id).limit(1)).all()
+queried = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "init_db_ms": (initialized - imported) * 1000,
+    "first_query_ms": (queried - initialized) * 1000,
+    "import_to_first_query_ms": (queried - started) * 1000,
+    "schema_created": created,
+}))
+"""
+
+
+def probe(url: str) -> dict:
+    started = clock.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env={**os.environ, "BOOKING_DB_URL": url},
+        capture_output=True, text=True, check=True,
+    )
+    sample = json.loads(completed.stdout.strip().splitlines()[-1])
+    sample["process_ms"] = (clock.perf_counter() - started) * 1000
+    return sample
+
+
+def summarize(samples: list[dict]) -> dict:
+    summary = {"repeat": len(samples), "schema_created": samples[0]["schema_created"]}
+    for key in ("import_ms", "init_db_ms", "first_query_ms", "import_to_first_query_ms", "process_ms"):
+        values = sorted(sample[key] for sample in samples)
+        summary[key] = {"min": values[0], "median": statistics.median(values), "max": values[-1]}
+    return summary
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="booking-startup-") as directory:
+        cold = [probe(f"sqlite:///{os.path.join(directory, f'cold-{i}.sqlite')}") for i in range(args.repeat)]
+        warm_url = f"sqlite:///{os.path.join(directory, 'warm.sqlite')}"
+        probe(warm_url)
+        warm = [probe(warm_url) for _ in range(args.repeat)]
+
+    report = {
+        "results": {"cold": summarize(cold), "warm": summarize(warm)},
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
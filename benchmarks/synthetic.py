@@ -0,0 +1,108 @@
+"""
+Synthetic schedules for benchmarks: executors, users, one-off events, recurrent series and breaks.
+"""
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from src.models import Executor, User, EventBreak
+from src.repositories import EventRepo, RecurrentEventRepo
+
+CHUNK = 10_000
+
+
+@dataclass
+class ScheduleConfig:
+    executors: int = 100
+    users: int = 1_000
+    events: int = 10_000
+    recurrent_events: int = 1_000
+    breaks: int = 1_000
+    days: int = 90
+    first_day: date = date(2024, 1, 1)
+    seed: int = 0
+
+    @classmethod
+    def scaled(cls, events: int, **overrides) -> "ScheduleConfig":
+        """A schedule with the given number of one-off events and the other tables sized in proportion."""
+        sizes = {
+            "executors": max(events // 100, 1),
+            "users": max(events // 10, 1),
+            "events": events,
+            "recurrent_events": max(events // 10, 1),
+            "breaks": max(events // 10, 1),
+        }
+        return cls(**(sizes | overrides))
+
+
+def random_slot(rng: random.Random, config: ScheduleConfig) -> tuple[date, time, time]:
+    day = config.first_day + timedelta(days=rng.randrange(config.days))
+    start = rng.randrange(8 * 4, 20 * 4)
+    length = rng.choice([2, 4, 6])
+    return day, time(start // 4, start % 4 * 15), time((start + length) // 4, (start + length) % 4 * 15)
+
+
+def chunks(rows: list, size: int = CHUNK):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def seed(db: Session, config: ScheduleConfig) -> ScheduleConfig:
+    """
+    Fill an empty database with a reproducible schedule. Rows go through the bulk insert paths,
+    so seeding 10^6 events takes seconds rather than an ORM flush per row.
+    Executor ids are 1..executors and user ids are 1..users.
+    """
+    rng = random.Random(config.seed)
+
+    db.execute(insert(Executor), [{"id": i} for i in range(1, config.executors + 1)])
+    for rows in chunks([
+        {"id": i, "name": f"user {i}", "role": "user",
+         "executor_id": i if i <= config.executors else None}
+        for i in range(1, config.users + 1)
+    ]):
+        db.execute(insert(User), rows)
+
+    def booking():
+        day, start_time, end_time = random_slot(rng, config)
+        return {
+            "user_id": rng.randint(1, config.users),
+            "executor_id": rng.randint(1, config.executors),
+            "event_type": "lesson",
+            "start_time": start_time,
+            "end_time": end_time,
+            "day": day,
+        }
+
+    for rows in chunks([booking() for _ in range(config.events)]):
+        EventRepo(db).new_bulk(rows)
+
+    series = []
+    for _ in range(config.recurrent_events):
+        row = booking()
+        row["interval"] = timedelta(weeks=rng.choice([1, 1, 2]))
+        row["start"] = datetime.combine(row["day"], row["start_time"])
+        row["end"] = row["start"] + timedelta(weeks=rng.randint(4, 52)) if rng.random() < 0.7 else None
+        series.append(row)
+    for rows in chunks(series):
+        RecurrentEventRepo(db).new_bulk(rows, today=config.first_day)
+
+    breaks = []
+    for _ in range(config.breaks):
+        start = datetime.combine(config.first_day, time(8)) + timedelta(
+            days=rng.randrange(config.days), minutes=15 * rng.randrange(48)
+        )
+        breaks.append({
+            "user_id": rng.randint(1, config.users),
+            "break_type": "break",
+            "start": start,
+            "end": start + timedelta(hours=rng.choice([1, 4, 24])),
+        })
+    for rows in chunks(breaks):
+        db.execute(insert(EventBreak), rows)
+
+    db.commit()
+    return config
@@ -0,0 +1,96 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Event, User, RecurrentEvent, EventBreak, Base, Executor, EventOccurrence
+from src.repositories import (
+    Repository, UserRepo, ExecutorRepo, EventRepo, RecurrentEventRepo, EventBreakRepo, EventOccurrenceRepo,
+)
+
+
+class AsyncRepository:
+    """
+    Repository over an AsyncSession. Writes reuse the synchronous repository through AsyncSession.run_sync,
+    so both variants create exactly the same rows.
+    """
+    db: AsyncSession
+    type_model: type[Base]
+    sync_repo: type[Repository]
+
+    def __init__(self, db: AsyncSession, type_model: type[Base]):
+        self.db = db
+        self.type_model = type_model
+
+    async def get(self, ident):
+        return await self.db.get(self.type_model, ident=ident)
+
+    async def all(self):
+        return (await self.db.scalars(select(self.type_model))).all()
+
+    async def delete(self, ident):
+        return await self._run("delete", ident)
+
+    async def _run(self, method: str, *args, **kwargs):
+        return await self.db.run_sync(lambda session: getattr(self.sync_repo(session), method)(*args, **kwargs))
+
+
+class AsyncUserRepo(AsyncRepository):
+    sync_repo = UserRepo
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, User)
+
+    async def new(self, name: str, role: str, is_exec: bool = False):
+        return await self._run("new", name, role, is_exec)
+
+
+class AsyncExecutorRepo(AsyncRepository):
+    sync_repo = ExecutorRepo
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, Executor)
+
+
+class AsyncEventRepo(AsyncRepository):
+    sync_repo = EventRepo
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, Event)
+
+    async def new(self, *args, **kwargs):
+        return await self._run("new", *args, **kwargs)
+
+    async def new_bulk(self, rows: list[dict]) -> list[int]:
+        return await self._run("new_bulk", rows)
+
+
+class AsyncRecurrentEventRepo(AsyncRepository):
+    sync_repo = RecurrentEventRepo
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, RecurrentEvent)
+
+    async def new(self, *args, **kwargs):
+        return await self._run("new", *args, **kwargs)
+
+    async def new_bulk(self, rows: list[dict], today=None, materialized: bool = False) -> list[int]:
+        return await self._run("new_bulk", rows, today, materialized)
+
+
+class AsyncEventBreakRepo(AsyncRepository):
+    sync_repo = EventBreakRepo
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, EventBreak)
+
+    async def new(self, *args, **kwargs):
+        return await self._run("new", *args, **kwargs)
+
+
+class AsyncEventOccurrenceRepo(AsyncRepository):
+    sync_repo = EventOccurrenceRepo
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, EventOccurrence)
+
+    async def roll_forward(self, today=None):
+        return await self._run("roll_forward", today)
@@ -0,0 +1,132 @@
+import asyncio
+from datetime import date, datetime, timedelta, time
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.availability import free_slots
+from src.models import Event, User, Executor, RecurrentEvent
+from src.service import EventService, BulkResult, merge_busy
+
+
+class AsyncEventService:
+    """
+    EventService for AsyncSession, e.g. aiosqlite locally or asyncpg in production.
+
+    Every operation runs the synchronous EventService code on the session's connection through
+    AsyncSession.run_sync, so both services share one implementation. When a readers session factory is given,
+    the independent queries of a read (one-off and recurrent events) run concurrently, each on its own session;
+    the objects they return are detached from self.db, so lazy relationships can't be loaded on them.
+    Sessions should be created with expire_on_commit=False, as usual with asyncio.
+    """
+
+    def __init__(
+            self,
+            db: AsyncSession,
+            readers: async_sessionmaker[AsyncSession] | None = None,
+            materialized: bool = False,
+    ):
+        self.db = db
+        self.readers = readers
+        self.materialized = materialized
+
+    async def _run(self, method: str, *args, **kwargs):
+        return await self.db.run_sync(
+            lambda session: getattr(EventService(session, self.materialized), method)(*args, **kwargs)
+        )
+
+    async def _read(self, method: str, *args):
+        async with self.readers() as session:
+            return await session.run_sync(
+                lambda sync_session: getattr(EventService(sync_session, self.materialized), method)(*args)
+            )
+
+    async def _gather(self, *calls: tuple[str, tuple]) -> list:
+        if self.readers is None:
+            return [await self._run(method, *args) for method, args in calls]
+        return await asyncio.gather(*(self._read(method, *args) for method, args in calls))
+
+    async def events_for_day(
+            self, day: date, executor: Executor, user: User | None = None, skip_rescheduled: bool = False
+    ):
+        events, recurrent_events = await self._gather(
+            ("_one_off_events_for_day", (day, executor, user, skip_rescheduled)),
+            ("_recurrent_events_for_day", (day, executor, user)),
+        )
+        return events + recurrent_events
+
+    async def events_for_period(
+            self,
+            start: datetime,
+            end: datetime,
+            executor: Executor,
+            user: User | None = None,
+            skip_rescheduled: bool = False,
+    ):
+        events, recurrent_events = await self._gather(
+            ("_one_off_events_for_period", (start, end, executor, user, skip_rescheduled)),
+            ("_recurrent_events_for_period", (start, end, executor, user)),
+        )
+        return events + recurrent_events
+
+    async def add_event(
+            self,
+            user: User,
+            executor: Executor,
+            event_type: str,
+            start_time: time,
+            end_time: time,
+            day: date,
+            interval: timedelta | None = None,
+            start: datetime | None = None,
+            end: datetime | None = None
+    ):
+        return await self._run("add_event", user, executor, event_type, start_time, end_time, day, interval, start, end)
+
+    async def reserve_event(
+            self,
+            user: User,
+            executor: Executor,
+            event_type: str,
+            start_time: time,
+            end_time: time,
+            day: date,
+            interval: timedelta | None = None,
+            start: datetime | None = None,
+            end: datetime | None = None
+    ):
+        return await self._run(
+            "reserve_event", user, executor, event_type, start_time, end_time, day, interval, start, end
+        )
+
+    async def add_events_bulk(self, items: list[dict]) -> BulkResult:
+        return await self._run("add_events_bulk", items)
+
+    async def cancel_event(self, event: Event):
+        return await self._run("cancel_event", event)
+
+    async def move_event(
+            self,
+            event: Event | RecurrentEvent,
+            new_st: time | None = None,
+            new_et: time | None = None,
+            new_interval: timedelta | None = None,
+            new_start: datetime | None = None,
+            new_end: datetime | None = None
+    ):
+        return await self._run("move_event", event, new_st, new_et, new_interval, new_start, new_end)
+
+    async def available_slots(self, executor: Executor, start: datetime, end: datetime, slot_size: timedelta):
+        busy = await self._busy_intervals_many([executor.id], start, end)
+        return list(free_slots(start, end, slot_size, busy[executor.id]))
+
+    async def available_slots_many(
+            self, executors: list[Executor], start: datetime, end: datetime, slot_size: timedelta
+    ) -> dict[int, list[tuple[datetime, datetime]]]:
+        busy = await self._busy_intervals_many([e.id for e in executors], start, end)
+        return {e.id: list(free_slots(start, end, slot_size, busy[e.id])) for e in executors}
+
+    async def _busy_intervals_many(self, executor_ids: list[int], start: datetime, end: datetime):
+        return merge_busy(executor_ids, *await self._gather(
+            ("_one_off_busy", (executor_ids, start, end)),
+            ("_recurrent_busy", (executor_ids, start, end)),
+        ))
@@ -0,0 +1,130 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+import numpy as np
+
+
+def free_slots(
+        start: datetime,
+        end: datetime,
+        slot_size: timedelta,
+        busy: Iterable[tuple[datetime, datetime]],
+) -> Iterator[tuple[datetime, datetime]]:
+    """
+    Lazily yield the slots of the grid start, start + slot_size, ... that fit before end
+    and don't overlap any busy interval.
+
+    A busy interval (b_start, b_end) blocks every slot whose start lies in the open range
+    (b_start - slot_size, b_end). Those ranges are sorted and merged once, then walked together
+    with the slot grid, jumping over blocked stretches instead of testing every slot against every event.
+    """
+    blocked = sorted((b_start - slot_size, b_end) for b_start, b_end in busy if b_start - slot_size < b_end)
+
+    merged = []
+    for low, high in blocked:
+        if merged and low < merged[-1][1]:
+            if high > merged[-1][1]:
+                merged[-1][1] = high
+        else:
+            merged.append([low, high])
+
+    i = 0
+    k = 0
+    current_slot = start
+    while current_slot + slot_size <= end:
+        while i < len(merged) and merged[i][1] <= current_slot:
+            i += 1
+        if i < len(merged) and merged[i][0] < current_slot:
+            # Skip to the first slot starting at or after the end of the blocked range
+            k = -(-(merged[i][1] - start) // slot_size)
+        else:
+            yield current_slot, current_slot + slot_size
+            k += 1
+        current_slot = start + k * slot_size
+
+
+def merge_intervals(intervals: Iterable[tuple[datetime, datetime]]) -> list[tuple[datetime, datetime]]:
+    """
+    Sort intervals and merge the overlapping ones. Empty and inverted intervals are dropped.
+    """
+    merged = []
+    for low, high in sorted(i for i in intervals if i[0] < i[1]):
+        if merged and low < merged[-1][1]:
+            if high > merged[-1][1]:
+                merged[-1] = (merged[-1][0], high)
+        else:
+            merged.append((low, high))
+    return merged
+
+
+def overlaps(merged: list[tuple[datetime, datetime]], start: datetime, end: datetime) -> bool:
+    """
+    Whether [start, end) overlaps any of the sorted, disjoint intervals returned by merge_intervals.
+    """
+    i = bisect_left(merged, (end,)) - 1
+    return i >= 0 and merged[i][1] > start
+
+
+def free_windows(
+        start: datetime,
+        end: datetime,
+        min_length: timedelta,
+        busy: Iterable[tuple[datetime, datetime]],
+) -> list[tuple[datetime, datetime]]:
+    """
+    The maximal stretches of [start, end) not covered by any busy interval and lasting at least min_length.
+    """
+    windows = []
+    free_from = start
+    for low, high in merge_intervals(busy):
+        if high <= free_from:
+            continue
+        if low >= end:
+            break
+        if low > free_from and low - free_from >= min_length:
+            windows.append((free_from, low))
+        free_from = max(free_from, high)
+    if end > free_from and end - free_from >= min_length:
+        windows.append((free_from, end))
+    return windows
+
+
+def free_slot_indexes(
+        start: int,
+        slot_size: int,
+        first: int,
+        stop: int,
+        busy_starts: np.ndarray,
+        busy_ends: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorized free_slots on integers, e.g. microseconds: the indexes k in [first, stop) of the free slots
+    start + k * slot_size. Slot k is blocked by a busy interval when its start lies in (b_start - slot_size, b_end),
+    exactly as in free_slots, so the slots are the same.
+    """
+    busy_starts = np.asarray(busy_starts, dtype=np.int64)
+    busy_ends = np.asarray(busy_ends, dtype=np.int64)
+    low = np.clip((busy_starts - start) // slot_size, first, stop) - first
+    high = np.clip(-((start - busy_ends) // slot_size), first, stop) - first
+    keep = low < high
+
+    # +1 where a blocked run starts, -1 where it ends: slots with a zero running sum are free
+    edges = np.zeros(stop - first + 1, dtype=np.int32)
+    np.add.at(edges, low[keep], 1)
+    np.add.at(edges, high[keep], -1)
+    return np.flatnonzero(np.cumsum(edges[:-1]) == 0) + first
+
+
+def free_slot_indexes_task(
+        task: tuple[int, int, int, int, list[tuple[int, np.ndarray, np.ndarray]]]
+) -> list[tuple[int, np.ndarray]]:
+    """
+    Process pool entry point: (start, slot_size, first, stop, [(executor id, busy starts, busy ends), ...])
+    to [(executor id, free slot indexes), ...]. Takes and returns only ints and arrays, which pickle compactly.
+    """
+    start, slot_size, first, stop, executors = task
+    return [
+        (executor_id, free_slot_indexes(start, slot_size, first, stop, starts, ends))
+        for executor_id, starts, ends in executors
+    ]
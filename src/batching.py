@@ -0,0 +1,154 @@
+"""
+Group commit for bookings: a queue in front of EventService.add_event that books many requests per transaction.
+"""
+import queue
+import threading
+import time as clock
+from concurrent.futures import Future
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.database import begin_immediate
+from src.models import User, Executor
+from src.service import EventService, SlotConflictError
+
+_CLOSE = object()
+
+
+class BookingQueue:
+    """
+    Bookings submitted from any thread are gathered by one writer thread for up to max_wait seconds or max_batch
+    items, checked together by EventService.add_events_bulk and committed in one transaction, so a burst of
+    bookings pays for one write lock and one commit per batch instead of one per booking.
+
+    The batch holds the locks reserve_event takes, so it is as atomic as booking each item with reserve_event
+    in start order: of two colliding items in a batch the earlier one wins. Every caller gets a Future that
+    resolves once the batch is committed to the new Event id, or the RecurrentEvent id for items with an
+    interval, or fails with SlotConflictError, or with the database error that failed the whole batch.
+
+        with BookingQueue(get_session_factory()) as bookings:
+            event_id = bookings.add_event(user, executor, "Math", time(9), time(10), day)
+    """
+
+    def __init__(
+            self,
+            session_factory: sessionmaker[Session],
+            max_batch: int = 256,
+            max_wait: float = 0.005,
+            materialized: bool = False,
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.materialized = materialized
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="booking-queue", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(
+            self,
+            user: User,
+            executor: Executor,
+            event_type: str,
+            start_time: time,
+            end_time: time,
+            day: date,
+            interval: timedelta | None = None,
+            start: datetime | None = None,
+            end: datetime | None = None
+    ) -> Future:
+        item = {
+            "user": user,
+            "executor": executor,
+            "event_type": event_type,
+            "start_time": start_time,
+            "end_time": end_time,
+            "day": day,
+            "interval": interval,
+            "start": start,
+            "end": end,
+        }
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BookingQueue is closed")
+            self._queue.put((item, future))
+        return future
+
+    def add_event(
+            self,
+            user: User,
+            executor: Executor,
+            event_type: str,
+            start_time: time,
+            end_time: time,
+            day: date,
+            interval: timedelta | None = None,
+            start: datetime | None = None,
+            end: datetime | None = None
+    ) -> int:
+        """
+        Book through the queue and wait for the batch. Raises SlotConflictError if the slot is taken.
+        """
+        return self.submit(user, executor, event_type, start_time, end_time, day, interval, start, end).result()
+
+    def close(self):
+        """
+        Book what was submitted so far, then stop the writer thread.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_CLOSE)
+        self._thread.join()
+
+    def _run(self):
+        closing = False
+        while not closing:
+            entry = self._queue.get()
+            if entry is _CLOSE:
+                return
+            batch = [entry]
+            deadline = clock.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    entry = self._queue.get(timeout=max(deadline - clock.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if entry is _CLOSE:
+                    closing = True
+                    break
+                batch.append(entry)
+            self._book([(item, future) for item, future in batch if future.set_running_or_notify_cancel()])
+
+    def _book(self, batch: list[tuple[dict, Future]]):
+        if not batch:
+            return
+        items = [item for item, _ in batch]
+        try:
+            with self.session_factory() as db:
+                begin_immediate(db)
+                executor_ids = sorted({item["executor"].id for item in items})
+                db.execute(select(Executor.id).where(Executor.id.in_(executor_ids)).with_for_update())
+                result = EventService(db, self.materialized).add_events_bulk(items)
+                db.commit()
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        for index, (_, future) in enumerate(batch):
+            if index in result.conflicts:
+                future.set_exception(SlotConflictError(result.conflicts[index]))
+            else:
+                future.set_result(result.created[index])
@@ -0,0 +1,97 @@
+from datetime import date, datetime, time, timedelta
+from typing import Iterable
+
+import numpy as np
+
+from src.recurrence import to_us
+
+# One cell per minute: a day takes 1440 bits, packed into 180 bytes
+GRANULARITY = timedelta(minutes=1)
+DAY = timedelta(days=1)
+
+
+class ScheduleBitmap:
+    """
+    Busy cells of one executor over consecutive whole days, packed eight cells to a byte.
+
+    A busy interval marks every cell it touches, so intervals that don't start and end on cell boundaries
+    are rounded outward and slots next to them may be reported busy. Empty intervals mark nothing.
+    Slot search requires the slot grid to be aligned with the cells.
+    """
+    __slots__ = ("first_day", "days", "granularity", "packed")
+
+    def __init__(self, first_day: date, days: int, granularity: timedelta = GRANULARITY, packed: np.ndarray | None = None):
+        if granularity <= timedelta() or DAY % granularity:
+            raise ValueError(f"granularity must divide a day evenly, got {granularity}")
+        self.first_day = first_day
+        self.days = days
+        self.granularity = granularity
+        self.packed = packed if packed is not None else np.zeros(-(-self.cells // 8), dtype=np.uint8)
+
+    @classmethod
+    def from_intervals(
+            cls,
+            intervals: Iterable[tuple[datetime, datetime]],
+            first_day: date,
+            days: int,
+            granularity: timedelta = GRANULARITY,
+    ) -> "ScheduleBitmap":
+        bitmap = cls(first_day, days, granularity)
+        pairs = np.array([(to_us(s), to_us(e)) for s, e in intervals], dtype=np.int64).reshape(-1, 2)
+        origin, step = to_us(bitmap.origin), granularity // timedelta(microseconds=1)
+        low = np.clip((pairs[:, 0] - origin) // step, 0, bitmap.cells)
+        high = np.clip(-(-(pairs[:, 1] - origin) // step), 0, bitmap.cells)
+        keep = low < high
+
+        # +1 where an interval starts, -1 where it ends: cells with a positive running sum are busy
+        edges = np.zeros(bitmap.cells + 1, dtype=np.int32)
+        np.add.at(edges, low[keep], 1)
+        np.add.at(edges, high[keep], -1)
+        bitmap.packed = np.packbits(np.cumsum(edges[:-1]) > 0)
+        return bitmap
+
+    @property
+    def cells_per_day(self) -> int:
+        return DAY // self.granularity
+
+    @property
+    def cells(self) -> int:
+        return self.days * self.cells_per_day
+
+    @property
+    def origin(self) -> datetime:
+        return datetime.combine(self.first_day, time.min)
+
+    @property
+    def nbytes(self) -> int:
+        return self.packed.nbytes
+
+    def busy(self) -> np.ndarray:
+        """
+        One bool per cell, for the whole span.
+        """
+        return np.unpackbits(self.packed, count=self.cells).astype(bool)
+
+    def is_busy(self, moment: datetime) -> bool:
+        cell = (moment - self.origin) // self.granularity
+        if not 0 <= cell < self.cells:
+            raise ValueError(f"{moment} is outside the bitmap")
+        return bool(self.packed[cell // 8] & (0x80 >> cell % 8))
+
+    def free_slots(self, start: datetime, end: datetime, slot_size: timedelta) -> list[tuple[datetime, datetime]]:
+        """
+        The slots of the grid start, start + slot_size, ... that fit before end and contain no busy cell,
+        the same slots free_slots yields when every busy interval is aligned with the cells.
+        """
+        if (start - self.origin) % self.granularity or slot_size % self.granularity or slot_size <= timedelta():
+            raise ValueError("start and slot_size must be aligned with the bitmap granularity")
+        first = (start - self.origin) // self.granularity
+        width = slot_size // self.granularity
+        count = max((end - start) // slot_size, 0)
+        if first < 0 or first + count * width > self.cells:
+            raise ValueError(f"[{start}, {end}) is outside the bitmap")
+
+        busy = self.busy()[first:first + count * width].reshape(count, width)
+        free = np.flatnonzero(~busy.any(axis=1))
+        starts = np.datetime64(start, "us") + free * np.timedelta64(slot_size // timedelta(microseconds=1), "us")
+        return [(s, s + slot_size) for s in starts.tolist()]
@@ -0,0 +1,143 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from src.models import Event, RecurrentEvent, EventOccurrence
+
+SESSION_KEY = "schedule_cache"
+PENDING_KEY = "schedule_cache_pending"
+
+
+def day_span(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+class ScheduleCache:
+    """
+    In-process LRU cache of busy (start, end) intervals per (executor id, day), shared by all sessions.
+
+    Writes invalidate the executor-days they touch as soon as they are made, and once more when the writing
+    session commits or rolls back, so a reader can't keep a schedule it read before the commit. Every
+    invalidation bumps the executor's generation, and a value computed under an older generation is not stored.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[int, date], list[tuple[datetime, datetime]]] = OrderedDict()
+        self._days: dict[int, set[date]] = {}
+        self._generations: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def generation(self, executor_id: int) -> int:
+        return self._generations.get(executor_id, 0)
+
+    def get(self, executor_id: int, day: date) -> list[tuple[datetime, datetime]] | None:
+        with self._lock:
+            intervals = self._entries.get((executor_id, day))
+            if intervals is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((executor_id, day))
+            self.hits += 1
+            return intervals
+
+    def put(self, executor_id: int, day: date, intervals: list[tuple[datetime, datetime]], generation: int):
+        with self._lock:
+            if generation != self.generation(executor_id):
+                return
+            self._entries[(executor_id, day)] = intervals
+            self._entries.move_to_end((executor_id, day))
+            self._days.setdefault(executor_id, set()).add(day)
+            while len(self._entries) > self.maxsize:
+                (evicted_executor, evicted_day), _ = self._entries.popitem(last=False)
+                self._days[evicted_executor].discard(evicted_day)
+                self.evictions += 1
+
+    def invalidate(self, executor_id: int, day: date | None = None):
+        """
+        Drop one executor-day, or every cached day of the executor when day is None.
+        """
+        with self._lock:
+            self._generations[executor_id] = self.generation(executor_id) + 1
+            days = self._days.get(executor_id, set())
+            for cached_day in ([day] if day is not None else list(days)):
+                self._entries.pop((executor_id, cached_day), None)
+                days.discard(cached_day)
+
+    def clear(self):
+        with self._lock:
+            for executor_id in self._days:
+                self._generations[executor_id] = self.generation(executor_id) + 1
+            self._entries.clear()
+            self._days.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def bind(self, db: Session):
+        """
+        Attach the cache to a session, so writes made through it invalidate the cache.
+        """
+        if db.info.get(SESSION_KEY) is self:
+            return
+        db.info[SESSION_KEY] = self
+        db.info[PENDING_KEY] = set()
+        event.listen(db, "after_commit", flush_pending)
+        event.listen(db, "after_soft_rollback", lambda session, transaction: flush_pending(session))
+
+
+def flush_pending(db: Session):
+    cache: ScheduleCache | None = db.info.get(SESSION_KEY)
+    pending = db.info.get(PENDING_KEY)
+    if cache is None or not pending:
+        return
+    for executor_id, day in pending:
+        cache.invalidate(executor_id, day)
+    pending.clear()
+
+
+def invalidate(db: Session | None, executor_id: int | None, day: date | None = None):
+    """
+    Invalidate an executor-day, or the whole executor when day is None, in the cache bound to the session.
+    """
+    if db is None or executor_id is None:
+        return
+    cache: ScheduleCache | None = db.info.get(SESSION_KEY)
+    if cache is None:
+        return
+    cache.invalidate(executor_id, day)
+    db.info[PENDING_KEY].add((executor_id, day))
+
+
+def invalidate_for(obj, db: Session | None = None):
+    """
+    Invalidate whatever part of the schedule the given model instance contributes to.
+    Recurrent events reach many days, so they invalidate the whole executor.
+    """
+    db = db or object_session(obj)
+    if db is None or SESSION_KEY not in db.info:
+        return
+    if isinstance(obj, Event):
+        invalidate(db, obj.executor_id, obj.date)
+        if obj.recurrences:
+            invalidate(db, obj.executor_id)
+    elif isinstance(obj, (RecurrentEvent, EventOccurrence)):
+        invalidate(db, obj.executor_id)
@@ -1,8 +1,192 @@
-from sqlalchemy import create_engine
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import (
+    create_engine, event, make_url, Connection, Engine, MetaData, Table, Column, Integer, inspect, select, insert,
+    delete,
+)
+from sqlalchemy.orm import sessionmaker, Session
 
 from loguru import logger
+from src.migrations import migrate
 from src.models import Base
 
-logger.info("Connecting to DB")
-engine = create_engine("sqlite:///../db/db.sqlite")  # ../
-Base.metadata.create_all(engine)
+DEFAULT_URL = os.environ.get(
+    "BOOKING_DB_URL", f"sqlite:///{Path(__file__).resolve().parent.parent / 'db' / 'db.sqlite'}"
+)
+# Bump whenever the models change, so init_db sets the schema up again on the next start
+SCHEMA_VERSION = 3
+
+# Kept out of Base.metadata, it describes the database rather than the domain
+schema_marker = Table("schema_version", MetaData(), Column("version", Integer, nullable=False))
+
+_engine: Engine | None = None
+_session_factory: sessionmaker[Session] | None = None
+_initialized: weakref.WeakSet[Engine] = weakref.WeakSet()
+_lock = threading.Lock()
+
+
+def is_memory_sqlite(url) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def make_engine(
+        url: str = DEFAULT_URL,
+        *,
+        journal_mode: str | None = "WAL",
+        synchronous: str | None = "NORMAL",
+        cache_size: int | None = -64_000,
+        mmap_size: int | None = 256 * 1024 * 1024,
+        busy_timeout: int | None = 5_000,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        read_only: bool = False,
+        **kwargs,
+) -> Engine:
+    """
+    Build an engine for the booking database.
+
+    For SQLite every new connection gets the given pragmas: WAL lets readers run while a writer commits,
+    synchronous=NORMAL is durable enough under WAL with one fsync per checkpoint instead of per commit,
+    a negative cache_size is in KiB, busy_timeout is in milliseconds. Pass None to keep SQLite's default.
+    A read-only engine sets query_only on SQLite and read-only transactions on PostgreSQL.
+    """
+    backend = make_url(url).get_backend_name()
+    if not is_memory_sqlite(url):
+        kwargs.setdefault("pool_size", pool_size)
+        kwargs.setdefault("max_overflow", max_overflow)
+    if read_only and backend == "postgresql":
+        kwargs.setdefault("execution_options", {})["postgresql_readonly"] = True
+
+    engine = create_engine(url, **kwargs)
+
+    if backend == "sqlite":
+        pragmas = {
+            "journal_mode": journal_mode,
+            "synchronous": synchronous,
+            "cache_size": cache_size,
+            "mmap_size": mmap_size,
+            "busy_timeout": busy_timeout,
+            "query_only": "ON" if read_only else None,
+        }
+
+        @event.listens_for(engine, "connect")
+        def set_pragmas(dbapi_connection, connection_record):
+            # Let SQLAlchemy emit BEGIN itself instead of the driver's implicit one, see begin_transaction
+            dbapi_connection.isolation_level = None
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                if value is not None:
+                    cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+
+        @event.listens_for(engine, "begin")
+        def begin_transaction(connection):
+            """
+            Transactions start with a plain BEGIN, or BEGIN IMMEDIATE with the sqlite_begin="IMMEDIATE"
+            execution option, which takes the write lock up front instead of failing to upgrade a read later.
+            """
+            mode = connection.get_execution_options().get("sqlite_begin", "")
+            connection.exec_driver_sql(f"BEGIN {mode}".rstrip())
+
+    return engine
+
+
+def make_session_factory(engine: Engine, **kwargs) -> sessionmaker[Session]:
+    kwargs.setdefault("expire_on_commit", False)
+    return sessionmaker(bind=engine, **kwargs)
+
+
+def begin_immediate(db: Session) -> Connection:
+    """
+    Start the session's transaction holding SQLite's write lock, for a read-check-write step that must not race.
+
+    Engines from make_engine do it through the sqlite_begin="IMMEDIATE" execution option. Other SQLite engines
+    ignore the option and their driver only begins at the first write, so BEGIN IMMEDIATE is sent here instead.
+    Other databases start as usual, the caller locks rows with SELECT ... FOR UPDATE.
+    """
+    connection = db.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+    if connection.dialect.name == "sqlite" and not connection.connection.driver_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+    return connection
+
+
+def get_engine() -> Engine:
+    """
+    The application engine for DEFAULT_URL, created on first use. Nothing connects before that.
+    """
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                logger.info("Connecting to DB")
+                _engine = make_engine()
+    return _engine
+
+
+def get_session_factory() -> sessionmaker[Session]:
+    global _session_factory
+    if _session_factory is None:
+        with _lock:
+            if _session_factory is None:
+                _session_factory = make_session_factory(get_engine())
+    return _session_factory
+
+
+def schema_version(connection) -> int | None:
+    """
+    The schema version recorded in the database, None if it has never been initialized.
+    """
+    if not inspect(connection).has_table(schema_marker.name):
+        return None
+    return connection.execute(select(schema_marker.c.version)).scalar()
+
+
+def init_db(engine: Engine | None = None) -> bool:
+    """
+    Make sure the schema of the database is current. Call it once at startup, before serving.
+
+    The version last set up is recorded in the schema_version table: when it matches SCHEMA_VERSION,
+    which is the common warm start, this costs one lookup instead of reflecting every table. Otherwise the
+    missing tables are created, the migrations newer than the recorded version are run (all of them when there
+    is no marker yet) and the marker is updated. Returns whether the schema was set up.
+    """
+    engine = engine or get_engine()
+    if engine in _initialized:
+        return False
+    with engine.begin() as connection:
+        version = schema_version(connection)
+        if version == SCHEMA_VERSION:
+            _initialized.add(engine)
+            return False
+        logger.info(f"Setting up DB schema version {SCHEMA_VERSION}")
+        Base.metadata.create_all(connection)
+        migrate(connection, version or 0)
+        schema_marker.create(connection, checkfirst=True)
+        connection.execute(delete(schema_marker))
+        connection.execute(insert(schema_marker).values(version=SCHEMA_VERSION))
+    _initialized.add(engine)
+    return True
+
+
+@contextmanager
+def unit_of_work(session_factory: sessionmaker[Session] | None = None) -> Iterator[Session]:
+    """
+    A session for one unit of work: committed when the block exits, rolled back if it raises, closed either way.
+    """
+    with (session_factory or get_session_factory()).begin() as session:
+        yield session
+
+
+def __getattr__(name: str):
+    # engine and SessionLocal used to be created at import time, keep them importable but lazy
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
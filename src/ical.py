@@ -0,0 +1,330 @@
+"""
+Streaming iCalendar (RFC 5545) export and import of schedules.
+
+Times are written as floating local times, like they are stored. Imported UTC and TZID times are converted
+to local time first. Series are written once, with an RRULE,
+instead of as their occurrences, and their template events are left out.
+"""
+from datetime import datetime, time, timedelta, timezone, tzinfo
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple, TextIO
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.models import Event, User, Executor, RecurrentEvent, EventBreak, time_span
+from src.service import EventService
+
+PRODID = "-//booking//schedule//EN"
+DOMAIN = "booking"
+KIND_PROPERTY = "X-BOOKING-KIND"
+DATETIME_FORMAT = "%Y%m%dT%H%M%S"
+# RRULE frequencies from the longest, so an interval is written in the largest unit dividing it
+FREQUENCIES = (("WEEKLY", 7 * 24 * 3600), ("DAILY", 24 * 3600), ("HOURLY", 3600), ("MINUTELY", 60), ("SECONDLY", 1))
+SECONDS = dict(FREQUENCIES)
+
+
+class ImportResult(NamedTuple):
+    created: int
+    # UID of the VEVENT -> why it wasn't booked
+    conflicts: dict[str, str]
+    # UID of the VEVENT -> why it couldn't be mapped to an event
+    skipped: dict[str, str]
+
+
+def escape(text: str) -> str:
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def unescape(text: str) -> str:
+    out, chars = [], iter(text)
+    for char in chars:
+        if char == "\\":
+            char = next(chars, "")
+            out.append("\n" if char in "nN" else char)
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def fold(line: str) -> str:
+    """
+    Split a content line into lines of at most 75 octets, continued by a leading space.
+    """
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        stop = min(start + limit, len(encoded))
+        # Don't cut a UTF-8 sequence in half
+        while stop < len(encoded) and encoded[stop] & 0xC0 == 0x80:
+            stop -= 1
+        parts.append(encoded[start:stop].decode())
+        start, limit = stop, 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_datetime(moment: datetime) -> str:
+    return moment.strftime(DATETIME_FORMAT)
+
+
+def rrule(interval: int | None, end: datetime | None) -> str | None:
+    if not interval or interval <= 0:
+        return None
+    freq, unit = next((f, s) for f, s in FREQUENCIES if interval % s == 0)
+    rule = f"FREQ={freq};INTERVAL={interval // unit}"
+    if end is not None:
+        rule += f";UNTIL={format_datetime(end)}"
+    return rule
+
+
+def vevent(uid: str, stamp: str, summary: str | None, start: datetime, end: datetime, kind: str,
+           rule: str | None = None) -> str:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}@{DOMAIN}",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART:{format_datetime(start)}",
+        f"DTEND:{format_datetime(end)}",
+        f"SUMMARY:{escape(summary or '')}",
+        f"{KIND_PROPERTY}:{kind}",
+    ]
+    if rule:
+        lines.append(f"RRULE:{rule}")
+    lines.append("END:VEVENT")
+    return "".join(map(fold, lines))
+
+
+def export_calendar(
+        db: Session,
+        out: TextIO,
+        executor: Executor | None = None,
+        user: User | None = None,
+        batch_size: int = 1000,
+) -> int:
+    """
+    Write the calendar of an executor, or of a user, to out and return the number of VEVENTs written.
+
+    An executor's calendar holds its events, its series and the breaks of its users; a user's calendar
+    holds the events booked for them, their series and their breaks. Rows are read as plain tuples through
+    server-side cursors and written as they come, so memory doesn't grow with the calendar.
+    """
+    if (executor is None) == (user is None):
+        raise ValueError("Export the calendar of either an executor or a user")
+    stamp = datetime.now(timezone.utc).strftime(DATETIME_FORMAT) + "Z"
+    owner = (Event.executor_id == executor.id) if executor else (Event.user_id == user.id)
+    series_owner = (RecurrentEvent.executor_id == executor.id) if executor else (RecurrentEvent.user_id == user.id)
+    break_owner = (User.executor_id == executor.id) if executor else (EventBreak.user_id == user.id)
+
+    templates = select(RecurrentEvent.event_id).where(RecurrentEvent.event_id != None)
+    events = select(Event.id, Event.event_type, Event.date, Event.start_time, Event.end_time).where(
+        owner, Event.cancelled == False, Event.id.not_in(templates)
+    )
+    series = select(
+        RecurrentEvent.id, Event.event_type, RecurrentEvent.start, RecurrentEvent.interval, RecurrentEvent.end,
+        Event.start_time, Event.end_time,
+    ).join(RecurrentEvent.event).where(series_owner, Event.cancelled == False)
+    breaks = select(EventBreak.id, EventBreak.break_type, EventBreak.start, EventBreak.end).join(EventBreak.user).where(
+        break_owner
+    )
+
+    def stream(statement):
+        return db.execute(statement.execution_options(yield_per=batch_size))
+
+    count = 0
+    out.write(f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{PRODID}\r\nCALSCALE:GREGORIAN\r\n")
+    for ident, summary, day, start_time, end_time in stream(events):
+        start = datetime.combine(day, start_time)
+        out.write(vevent(f"event-{ident}", stamp, summary, start, start + time_span(start_time, end_time), "event"))
+        count += 1
+    for ident, summary, start, interval, end, start_time, end_time in stream(series):
+        out.write(vevent(
+            f"series-{ident}", stamp, summary, start, start + time_span(start_time, end_time), "series",
+            rrule(interval, end),
+        ))
+        count += 1
+    for ident, summary, start, end in stream(breaks):
+        out.write(vevent(f"break-{ident}", stamp, summary, start, end, "break"))
+        count += 1
+    out.write("END:VCALENDAR\r\n")
+    return count
+
+
+def unfolded_lines(source: Iterable[str]) -> Iterator[str]:
+    """
+    Content lines of an iCalendar stream, with folded lines joined back.
+    """
+    current = None
+    for raw in source:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_events(source: Iterable[str]) -> Iterator[dict[str, tuple[dict[str, str], str]]]:
+    """
+    Incrementally yield every VEVENT of an iCalendar stream as a {name: (parameters, value)} dict.
+    Nested components such as VALARM are skipped.
+    """
+    component = None
+    depth = 0
+    for line in unfolded_lines(source):
+        head, _, value = line.partition(":")
+        name, *params = head.split(";")
+        name = name.upper()
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and depth == 0:
+                component = {}
+            elif component is not None:
+                depth += 1
+        elif name == "END":
+            if depth:
+                depth -= 1
+            elif value.upper() == "VEVENT" and component is not None:
+                yield component
+                component = None
+        elif component is not None and not depth:
+            component[name] = (dict(p.partition("=")[::2] for p in params), value)
+
+
+def parse_datetime(params: dict[str, str], value: str, zone: tzinfo | None = None) -> datetime:
+    """
+    Parse a DATE-TIME. Floating times are returned as written, UTC and TZID times as the wall clock time of zone,
+    the local time zone by default. Raises ValueError for unknown TZIDs.
+    """
+    if params.get("VALUE", "").upper() == "DATE" or "T" not in value:
+        raise ValueError("all-day events can't be booked")
+    source = None
+    if value.endswith("Z"):
+        source, value = timezone.utc, value[:-1]
+    elif "TZID" in params:
+        try:
+            source = ZoneInfo(params["TZID"].strip('"'))
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"unknown time zone {params['TZID']!r}") from None
+    if len(value) != 15 or value[8] != "T" or not (value[:8] + value[9:]).isdigit():
+        raise ValueError(f"invalid date-time {value!r}")
+    # Slicing is several times faster than strptime, which dominates parsing large files
+    moment = datetime(int(value[:4]), int(value[4:6]), int(value[6:8]), int(value[9:11]), int(value[11:13]),
+                      int(value[13:15]))
+    if source is None:
+        return moment
+    return moment.replace(tzinfo=source).astimezone(zone).replace(tzinfo=None)
+
+
+def parse_duration(value: str) -> timedelta:
+    sign = -1 if value.startswith("-") else 1
+    value = value.lstrip("+-").removeprefix("P")
+    units = {"W": "weeks", "D": "days", "H": "hours", "M": "minutes", "S": "seconds"}
+    kwargs, number = {}, ""
+    for char in value:
+        if char.isdigit():
+            number += char
+        elif char in units:
+            kwargs[units[char]] = int(number)
+            number = ""
+        elif char != "T":
+            raise ValueError(f"invalid duration {value}")
+    return sign * timedelta(**kwargs)
+
+
+def parse_rrule(value: str, start: datetime, zone: tzinfo | None = None) -> tuple[timedelta, datetime | None]:
+    """
+    (interval, end of the series) of a RRULE. Only rules repeating at a fixed interval can be booked.
+    """
+    parts = dict(part.partition("=")[::2] for part in value.upper().split(";"))
+    freq = parts.pop("FREQ", "")
+    if freq not in SECONDS:
+        raise ValueError(f"unsupported RRULE frequency {freq!r}")
+    interval = timedelta(seconds=SECONDS[freq] * int(parts.pop("INTERVAL", 1)))
+    until, count = parts.pop("UNTIL", None), parts.pop("COUNT", None)
+    end = None
+    if until:
+        end = parse_datetime({}, until, zone) if "T" in until else \
+            datetime.combine(datetime.strptime(until, "%Y%m%d").date(), time.max)
+    elif count:
+        end = start + (int(count) - 1) * interval
+    parts.pop("WKST", None)
+    if parts:
+        raise ValueError(f"unsupported RRULE parts {', '.join(parts)}")
+    return interval, end
+
+
+def to_item(component: dict, user: User, executor: Executor, zone: tzinfo | None = None) -> dict:
+    """
+    The add_event arguments of a parsed VEVENT, in the wall clock time of zone. Raises ValueError for events
+    that can't be booked.
+    """
+    if component.get(KIND_PROPERTY, ({}, ""))[1] == "break":
+        raise ValueError("breaks are not imported")
+    if component.get("STATUS", ({}, ""))[1].upper() == "CANCELLED":
+        raise ValueError("cancelled")
+    if "DTSTART" not in component:
+        raise ValueError("no DTSTART")
+    start = parse_datetime(*component["DTSTART"], zone)
+    if "DTEND" in component:
+        end = parse_datetime(*component["DTEND"], zone)
+    elif "DURATION" in component:
+        end = start + parse_duration(component["DURATION"][1])
+    else:
+        raise ValueError("no DTEND or DURATION")
+    if not start < end or end.date() != start.date():
+        raise ValueError("events must end after they start, on the same day")
+
+    item = {
+        "user": user,
+        "executor": executor,
+        "event_type": unescape(component.get("SUMMARY", ({}, ""))[1]),
+        "start_time": start.time(),
+        "end_time": end.time(),
+        "day": start.date(),
+    }
+    if "RRULE" in component:
+        interval, series_end = parse_rrule(component["RRULE"][1], start, zone)
+        item |= {"interval": interval, "start": start, "end": series_end}
+    return item
+
+
+def import_calendar(
+        service: EventService,
+        source: Iterable[str],
+        user: User,
+        executor: Executor,
+        batch_size: int = 1000,
+        zone: tzinfo | None = None,
+) -> ImportResult:
+    """
+    Book the VEVENTs read from source, e.g. an open .ics file, for user with executor.
+    UTC and TZID times are booked at their wall clock time in zone, the local time zone by default.
+
+    The file is parsed as it is read and booked batch_size events at a time through add_events_bulk,
+    committing after every batch, so memory stays flat and a failure keeps the batches already booked.
+    Events colliding with the schedule or with each other are reported as conflicts, events that can't
+    be mapped to a booking (all-day, multi-day, breaks, unsupported RRULEs, unknown time zones) as skipped.
+    """
+    created, conflicts, skipped = 0, {}, {}
+    components = enumerate(parse_events(source))
+    while batch := list(islice(components, batch_size)):
+        items, uids = [], []
+        for position, component in batch:
+            # VEVENTs without a UID are reported by their position in the file
+            uid = component.get("UID", ({}, f"#{position}"))[1]
+            try:
+                items.append(to_item(component, user, executor, zone))
+                uids.append(uid)
+            except ValueError as e:
+                skipped[uid] = str(e)
+        result = service.add_events_bulk(items)
+        service.db.commit()
+        created += len(result.created)
+        conflicts.update((uids[index], reason) for index, reason in result.conflicts.items())
+    return ImportResult(created, conflicts, skipped)
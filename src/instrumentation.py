@@ -0,0 +1,175 @@
+"""
+Opt-in metrics for the service and repository hot paths: wall time, SQL statements and rows fetched per call.
+
+    from src.instrumentation import metrics
+    metrics.enable()
+    ...
+    print(metrics.to_prometheus())
+
+While disabled, an instrumented method costs one attribute check and no event hooks are installed.
+"""
+import inspect
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+
+from sqlalchemy import event, Engine
+from sqlalchemy.orm import Session
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+ROW_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """(upper bound, observations <= bound) pairs, ending with +Inf, as Prometheus expects."""
+        pairs, total = [], 0
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "sum": self.sum, "buckets": dict(self.cumulative())}
+
+
+class CallCounters:
+    __slots__ = ("statements", "rows")
+
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+
+
+_current: ContextVar[CallCounters | None] = ContextVar("booking_call_counters", default=None)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counters = _current.get()
+    if counters is not None:
+        counters.statements += 1
+
+
+def _count_rows(orm_execute_state):
+    """
+    Buffers the result of ORM executions to count its rows. Streaming (yield_per) executions are left alone
+    so they keep constant memory, and their rows aren't counted.
+    """
+    counters = _current.get()
+    if counters is None or not orm_execute_state.is_select or "yield_per" in orm_execute_state.execution_options:
+        return None
+    frozen = orm_execute_state.invoke_statement().freeze()
+    counters.rows += len(frozen.data)
+    return frozen()
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.histograms: dict[str, dict[str, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        if self.enabled:
+            return
+        event.listen(Engine, "before_cursor_execute", _count_statement)
+        event.listen(Session, "do_orm_execute", _count_rows)
+        self.enabled = True
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        event.remove(Engine, "before_cursor_execute", _count_statement)
+        event.remove(Session, "do_orm_execute", _count_rows)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+
+    def observe(self, method: str, seconds: float, statements: int, rows: int):
+        with self._lock:
+            histograms = self.histograms.get(method)
+            if histograms is None:
+                histograms = self.histograms[method] = {
+                    "duration_seconds": Histogram(LATENCY_BUCKETS),
+                    "sql_statements": Histogram(STATEMENT_BUCKETS),
+                    "rows_fetched": Histogram(ROW_BUCKETS),
+                }
+            histograms["duration_seconds"].observe(seconds)
+            histograms["sql_statements"].observe(statements)
+            histograms["rows_fetched"].observe(rows)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                method: {name: histogram.to_dict() for name, histogram in histograms.items()}
+                for method, histograms in self.histograms.items()
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "booking_method") -> str:
+        with self._lock:
+            lines = []
+            for name in ("duration_seconds", "sql_statements", "rows_fetched"):
+                metric = f"{prefix}_{name}"
+                lines += [f"# HELP {metric} Per-call {name.replace('_', ' ')} of instrumented methods",
+                          f"# TYPE {metric} histogram"]
+                for method, histograms in sorted(self.histograms.items()):
+                    histogram = histograms[name]
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{metric}_bucket{{method="{method}",le="{bound}"}} {count}')
+                    lines.append(f'{metric}_sum{{method="{method}"}} {histogram.sum}')
+                    lines.append(f'{metric}_count{{method="{method}"}} {histogram.count}')
+            return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def instrumented(method):
+    """
+    Record a call to method in metrics when they are enabled. Calls nested inside another instrumented call
+    count towards both. Methods taking self are named after the runtime class, so repositories sharing
+    Repository.get are told apart.
+    """
+    takes_self = next(iter(inspect.signature(method).parameters), None) == "self"
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            return method(*args, **kwargs)
+
+        name = f"{type(args[0]).__name__}.{method.__name__}" if takes_self else method.__qualname__
+        parent = _current.get()
+        counters = CallCounters()
+        token = _current.set(counters)
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            if parent is not None:
+                parent.statements += counters.statements
+                parent.rows += counters.rows
+            metrics.observe(name, elapsed, counters.statements, counters.rows)
+
+    return wrapper
@@ -0,0 +1,91 @@
+"""
+Upgrades of databases set up by an older schema version, run by database.init_db.
+
+create_all only creates missing tables, so every change to an existing table gets a migration here.
+Migrations must be idempotent: a database without a schema marker runs all of them.
+"""
+from sqlalchemy import Connection, Table, inspect, select, text, update, bindparam
+
+from src.models import Base, Event, RecurrentEvent, event_span
+
+CHUNK = 10_000
+
+
+def add_columns(connection: Connection, table: Table, names: list[str]):
+    """
+    ALTER TABLE ADD COLUMN for the given model columns the table is missing.
+    """
+    existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    quote = connection.dialect.identifier_preparer.quote
+    for name in names:
+        if name not in existing:
+            column_type = table.c[name].type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(name)} {column_type}"))
+
+
+def add_materialized_until(connection: Connection):
+    """
+    Version 2: recurrent_events.materialized_until, left NULL so EventOccurrenceRepo.roll_forward
+    materializes every existing series over the whole horizon.
+    """
+    add_columns(connection, RecurrentEvent.__table__, ["materialized_until"])
+
+
+def add_event_span(connection: Connection):
+    """
+    Version 2: events.start_at and events.end_at, backfilled from date, start_time and end_time.
+    """
+    add_columns(connection, Event.__table__, ["start_at", "end_at"])
+    # Superseded by the indexes on start_at
+    for name in ("ix_events_user_date", "ix_events_executor_date_start"):
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    backfill_event_span(connection)
+
+
+def backfill_event_span(connection: Connection, chunk: int = CHUNK) -> int:
+    """
+    Fill start_at and end_at of the events missing them, chunk rows at a time in id order.
+    Returns the number of rows updated.
+    """
+    events = Event.__table__
+    pending = select(events.c.id, events.c.date, events.c.start_time, events.c.end_time).where(
+        events.c.start_at == None,
+        events.c.date != None,
+        events.c.start_time != None,
+        events.c.end_time != None,
+    ).order_by(events.c.id).limit(chunk)
+    fill = update(events).where(events.c.id == bindparam("row_id")).values(
+        start_at=bindparam("new_start_at"), end_at=bindparam("new_end_at")
+    )
+
+    updated, last_id = 0, 0
+    while rows := connection.execute(pending.where(events.c.id > last_id)).all():
+        values = []
+        for ident, day, start_time, end_time in rows:
+            start_at, end_at = event_span(day, start_time, end_time)
+            values.append({"row_id": ident, "new_start_at": start_at, "new_end_at": end_at})
+        connection.execute(fill, values)
+        updated += len(rows)
+        last_id = rows[-1][0]
+    return updated
+
+
+# (schema version, migration bringing the schema to it), in order
+MIGRATIONS = [
+    (2, add_materialized_until),
+    (2, add_event_span),
+    # Version 3 only adds ix_events_reschedule, created below with the other missing indexes
+]
+
+
+def migrate(connection: Connection, from_version: int):
+    """
+    Run the migrations newer than from_version, then create the indexes declared on the models
+    that existing tables are missing.
+    """
+    for version, migration in MIGRATIONS:
+        if version > from_version:
+            migration(connection)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Time, Boolean, Date, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Time, Boolean, Date, DateTime, Index, event
 from sqlalchemy.orm import relationship, declarative_base
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time, date
 
 Base = declarative_base()
 
 
+def time_span(start_time: time, end_time: time) -> timedelta:
+    return datetime.combine(date.min, end_time) - datetime.combine(date.min, start_time)
+
+
+def event_span(day: date, start_time: time, end_time: time) -> tuple[datetime, datetime]:
+    return datetime.combine(day, start_time), datetime.combine(day, end_time)
+
+
 class Model:
     id = Column(Integer, primary_key=True, autoincrement=True)
 
@@ -18,6 +26,9 @@ class Executor(Model, Base):
 
 class User(Model, Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        Index('ix_users_executor', 'executor_id'),
+    )
     name = Column(String)
     role = Column(String)
     events = relationship('Event', back_populates='user')
@@ -28,6 +39,13 @@ class User(Model, Base):
 
 class Event(Model, Base):
     __tablename__ = 'events'
+    __table_args__ = (
+        Index('ix_events_executor_date', 'executor_id', 'date', 'cancelled'),
+        Index('ix_events_executor_user_date', 'executor_id', 'user_id', 'date'),
+        Index('ix_events_executor_start_at', 'executor_id', 'start_at', 'end_at'),
+        Index('ix_events_user_start_at', 'user_id', 'start_at', 'end_at'),
+        Index('ix_events_reschedule', 'reschedule_id'),
+    )
     user_id = Column(Integer, ForeignKey('users.id'))
     user = relationship(User, back_populates='events')
     executor_id = Column(Integer, ForeignKey('executors.id'), nullable=False)
@@ -37,42 +55,102 @@ class Event(Model, Base):
     end_time = Column(Time)
     date = Column(Date)
     weekday = Column(Integer)
+    # date + start_time and date + end_time, stored so period and overlap queries are index range scans
+    start_at = Column(DateTime)
+    end_at = Column(DateTime)
     cancelled = Column(Boolean, default=False)
+    # A superseded event has is_rescheduled set and points to the event replacing it, see EventRepo.history
     reschedule_id = Column(Integer, ForeignKey('events.id'), nullable=True, default=None)
     reschedule = relationship('Event')
     is_rescheduled = Column(Boolean, default=False)
+    recurrences = relationship('RecurrentEvent', back_populates='event')
+
+    def sync_span(self):
+        """
+        Recompute start_at and end_at after date, start_time or end_time changed.
+        Runs on every insert and update, call it directly to read the span before the next flush.
+        """
+        if self.date is None or self.start_time is None or self.end_time is None:
+            self.start_at = self.end_at = None
+        else:
+            self.start_at, self.end_at = event_span(self.date, self.start_time, self.end_time)
+
+
+@event.listens_for(Event, "before_insert")
+@event.listens_for(Event, "before_update")
+def sync_event_span(mapper, connection, target: Event):
+    target.sync_span()
 
 
 class RecurrentEvent(Model, Base):
     __tablename__ = 'recurrent_events'
+    __table_args__ = (
+        Index('ix_recurrent_events_executor_start', 'executor_id', 'start', 'end'),
+        Index('ix_recurrent_events_executor_user_start', 'executor_id', 'user_id', 'start'),
+        Index('ix_recurrent_events_user_start', 'user_id', 'start', 'end'),
+    )
     user_id = Column(Integer, ForeignKey('users.id'))
     user = relationship(User, back_populates='recurrent_events')
     executor_id = Column(Integer, ForeignKey('executors.id'), nullable=False)
     executor = relationship(Executor, back_populates='recurrent_jobs')
     event_id = Column(Integer, ForeignKey('events.id'))
-    event = relationship(Event)
+    event = relationship(Event, back_populates='recurrences')
     interval = Column(Integer)
     start = Column(DateTime)
     end = Column(DateTime, nullable=True)
+    occurrences = relationship('EventOccurrence', back_populates='recurrent_event', cascade='all, delete-orphan')
+    materialized_until = Column(DateTime, nullable=True, default=None)
+
+    @property
+    def duration(self) -> timedelta:
+        """
+        Length of every occurrence, taken from the template event.
+        """
+        if self.event is None:
+            return timedelta()
+        return time_span(self.event.start_time, self.event.end_time)
 
     def get_next_occurrence(self, after: datetime, before: datetime | None = None):
         """
         Given an Event and a datetime, return the next occurrence of the event after the given datetime.
+        Occurrences past the end of the series don't count. recurrence.has_occurrence_between is the same test in SQL.
         """
-        if after < self.start:
+        if after < self.start or not self.interval or self.interval <= 0:
             return None
 
-        elapsed_time = (after - self.start).total_seconds()
-        intervals_passed = (elapsed_time // self.interval) + 1
-        occur = self.start + timedelta(seconds=intervals_passed * self.interval)
+        step = timedelta(seconds=self.interval)
+        intervals_passed = (after - self.start) // step + 1
+        occur = self.start + intervals_passed * step
         if before and occur > before:
             return None
+        if self.end is not None and occur > self.end:
+            return None
         return occur
 
 
+class EventOccurrence(Model, Base):
+    """
+    A stored occurrence of a recurrent event, kept for a rolling horizon so reads are plain range queries.
+    """
+    __tablename__ = 'event_occurrences'
+    __table_args__ = (
+        Index('ix_event_occurrences_executor_start', 'executor_id', 'start', 'end'),
+        Index('ix_event_occurrences_recurrent_event', 'recurrent_event_id', 'start'),
+        Index('ix_event_occurrences_user_start', 'user_id', 'start', 'end'),
+    )
+    recurrent_event_id = Column(Integer, ForeignKey('recurrent_events.id'), nullable=False)
+    recurrent_event = relationship(RecurrentEvent, back_populates='occurrences')
+    executor_id = Column(Integer, ForeignKey('executors.id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id'))
+    start = Column(DateTime)
+    end = Column(DateTime)
+
 
 class EventBreak(Model, Base):
     __tablename__ = 'event_breaks'
+    __table_args__ = (
+        Index('ix_event_breaks_user_start', 'user_id', 'start', 'end'),
+    )
     user_id = Column(Integer, ForeignKey('users.id'))
     user = relationship(User, back_populates='event_breaks')
     break_type = Column(String)
@@ -0,0 +1,209 @@
+from datetime import date, datetime, time, timedelta
+from typing import Hashable, Iterable, Sequence
+
+import numpy as np
+from sqlalchemy import BigInteger, ColumnElement, and_, case, cast, func, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from src.models import Event, RecurrentEvent, EventOccurrence, time_span
+
+US = 1_000_000
+# Stands in for a missing series end, far enough from the int64 limits for the arithmetic below
+NO_END = np.iinfo(np.int64).max // 4
+# Non-positive intervals get a step no window can reach, so the series yields only its first occurrence
+NO_REPEAT = np.iinfo(np.int64).max // 4
+# How far ahead occurrences are stored in the event_occurrences table
+HORIZON = timedelta(days=90)
+
+
+def to_us(moment: datetime) -> int:
+    return int(np.datetime64(moment, "us").astype(np.int64))
+
+
+def from_us(values: np.ndarray) -> list[datetime]:
+    return values.astype("datetime64[us]").tolist()
+
+
+class epoch_us(FunctionElement):
+    """
+    Microseconds since the epoch of a naive DateTime column, as an exact integer, like to_us.
+    """
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(epoch_us)
+def _epoch_us(element, compiler, **kw):
+    return f"CAST(EXTRACT(EPOCH FROM {compiler.process(element.clauses, **kw)}) * 1000000 AS BIGINT)"
+
+
+@compiles(epoch_us, "sqlite")
+def _epoch_us_sqlite(element, compiler, **kw):
+    # DateTime is stored as 'YYYY-MM-DD HH:MM:SS.ffffff': whole seconds from strftime, microseconds from the text,
+    # julianday would lose precision
+    column = compiler.process(element.clauses, **kw)
+    return f"(CAST(strftime('%s', {column}) AS INTEGER) * 1000000 + CAST(substr({column}, 21, 6) AS INTEGER))"
+
+
+def has_occurrence_between(after: datetime, before: datetime) -> ColumnElement[bool]:
+    """
+    Whether a recurrent event has an occurrence strictly after after and at or before before, within its end:
+    RecurrentEvent.get_next_occurrence(after, before) is not None, evaluated by the database.
+    """
+    start = epoch_us(RecurrentEvent.start)
+    # NULL rather than a division by zero for series that don't repeat, which the interval > 0 test rejects anyway
+    step = cast(func.nullif(RecurrentEvent.interval, 0), BigInteger) * US
+    following = start + ((to_us(after) - start) // step + 1) * step
+    return and_(
+        RecurrentEvent.start <= after,
+        RecurrentEvent.interval > 0,
+        following <= to_us(before),
+        or_(RecurrentEvent.end == None, following <= epoch_us(RecurrentEvent.end)),
+    )
+
+
+def has_occurrence_overlapping(start: datetime, end: datetime) -> ColumnElement[bool]:
+    """
+    Whether a recurrent event has an occurrence overlapping [start, end), within its end, evaluated by the database:
+    the series the event_occurrences table has rows for in the window. Occurrences last as long as the template
+    event, so the query must join RecurrentEvent.event.
+    """
+    anchor = epoch_us(RecurrentEvent.start)
+    step = cast(func.nullif(RecurrentEvent.interval, 0), BigInteger) * US
+    # An occurrence overlaps the window when it starts after this and before the window ends
+    after = to_us(start) - (epoch_us(Event.end_at) - epoch_us(Event.start_at))
+    first = case((anchor > after, anchor), else_=anchor + ((after - anchor) // step + 1) * step)
+    return and_(
+        or_(anchor > after, RecurrentEvent.interval > 0),
+        first < to_us(end),
+        or_(RecurrentEvent.end == None, first <= epoch_us(RecurrentEvent.end)),
+    )
+
+
+def expand(
+        anchors: np.ndarray,
+        intervals: np.ndarray,
+        durations: np.ndarray,
+        untils: np.ndarray,
+        start: int,
+        end: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Expand a batch of series into every occurrence overlapping the window [start, end).
+
+    Occurrence k of series i starts at anchors[i] + k * intervals[i] for k >= 0, as long as it doesn't start
+    after untils[i]. Anchors, durations, untils and the window are int64 microseconds since the epoch,
+    intervals are seconds. Returns (series index, occurrence starts, occurrence ends), ordered by series.
+    """
+    anchors = np.asarray(anchors, dtype=np.int64)
+    durations = np.asarray(durations, dtype=np.int64)
+    untils = np.asarray(untils, dtype=np.int64)
+    steps = np.asarray(intervals, dtype=np.int64)
+    steps = np.where(steps > 0, steps * US, NO_REPEAT)
+
+    # First k with anchor + k * step + duration > start (>= start for zero-length occurrences)
+    offset = start - durations - anchors
+    first = np.where(durations > 0, offset // steps + 1, -(-offset // steps))
+    first = np.maximum(first, 0)
+    # Last k with anchor + k * step < end and anchor + k * step <= until
+    last = np.minimum((end - anchors - 1) // steps, (untils - anchors) // steps)
+
+    counts = np.maximum(last - first + 1, 0)
+    total = int(counts.sum())
+    index = np.repeat(np.arange(len(anchors)), counts)
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    starts = anchors[index] + (first[index] + within) * steps[index]
+    return index, starts, starts + durations[index]
+
+
+def expand_occurrences(
+        series: Sequence[RecurrentEvent], start: datetime, end: datetime
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Every occurrence of the given recurrent events overlapping [start, end),
+    as (index into series, starts, ends) with datetime64[us] starts and ends.
+    """
+    index, starts, ends = expand(
+        np.array([to_us(s.start) for s in series], dtype=np.int64),
+        np.array([s.interval or 0 for s in series], dtype=np.int64),
+        np.array([s.duration // timedelta(microseconds=1) for s in series], dtype=np.int64),
+        np.array([to_us(s.end) if s.end else NO_END for s in series], dtype=np.int64),
+        to_us(start),
+        to_us(end),
+    )
+    return index, starts.astype("datetime64[us]"), ends.astype("datetime64[us]")
+
+
+def occurrence_intervals(
+        rows: Iterable[tuple[datetime, int, datetime | None, time, time]], start: datetime, end: datetime
+) -> list[tuple[datetime, datetime]]:
+    """
+    Occurrences overlapping [start, end) as datetime pairs, from (start, interval, end, start_time, end_time) rows
+    of a recurrent event joined with its template event.
+    """
+    return grouped_occurrence_intervals(((None, *row) for row in rows), start, end).get(None, [])
+
+
+def grouped_occurrence_intervals(
+        rows: Iterable[tuple[Hashable, datetime, int, datetime | None, time, time]], start: datetime, end: datetime
+) -> dict[Hashable, list[tuple[datetime, datetime]]]:
+    """
+    Same as occurrence_intervals for rows prefixed with a grouping key, such as the executor id,
+    expanded in one batch and returned per key.
+    """
+    rows = list(rows)
+    if not rows:
+        return {}
+    index, starts, ends = expand(
+        np.array([to_us(r[1]) for r in rows], dtype=np.int64),
+        np.array([r[2] or 0 for r in rows], dtype=np.int64),
+        np.array([time_span(r[4], r[5]) // timedelta(microseconds=1) for r in rows], dtype=np.int64),
+        np.array([to_us(r[3]) if r[3] else NO_END for r in rows], dtype=np.int64),
+        to_us(start),
+        to_us(end),
+    )
+    grouped = {}
+    for i, occurrence_start, occurrence_end in zip(index.tolist(), from_us(starts), from_us(ends)):
+        grouped.setdefault(rows[i][0], []).append((occurrence_start, occurrence_end))
+    return grouped
+
+
+def horizon(today: date | None = None) -> tuple[datetime, datetime]:
+    """
+    The rolling window [start of today, start of today + HORIZON) kept in the event_occurrences table.
+    """
+    start = datetime.combine(today or date.today(), time.min)
+    return start, start + HORIZON
+
+
+def is_cancelled(series: RecurrentEvent) -> bool:
+    return series.event is not None and bool(series.event.cancelled)
+
+
+def materialize(series: RecurrentEvent, today: date | None = None) -> RecurrentEvent:
+    """
+    Replace the stored occurrences of a series with the ones overlapping the rolling horizon.
+    """
+    start, until = horizon(today)
+    series.materialized_until = until
+    if is_cancelled(series) or series.start is None:
+        series.occurrences = []
+        return series
+
+    _, starts, ends = expand_occurrences([series], start, until)
+    series.occurrences = [
+        EventOccurrence(executor_id=series.executor_id, user_id=series.user_id, start=s, end=e)
+        for s, e in zip(starts.tolist(), ends.tolist())
+    ]
+    return series
+
+
+def refresh_occurrences(series: RecurrentEvent) -> RecurrentEvent:
+    """
+    Re-materialize a changed series if its occurrences are stored. Series that never were are left to
+    EventOccurrenceRepo.roll_forward.
+    """
+    if series.materialized_until is not None:
+        materialize(series)
+    return series
@@ -1,8 +1,36 @@
+from collections import defaultdict, deque
 from datetime import datetime, date, time, timedelta
 
-from sqlalchemy.orm import Session
+from sqlalchemy import CTE, and_, delete, func, insert, literal, or_, select, union_all
+from sqlalchemy.orm import Session, contains_eager
 
-from src.models import Event, User, RecurrentEvent, EventBreak, Base, Executor
+from src.cache import invalidate, invalidate_for
+from src.instrumentation import instrumented
+from src.models import Event, User, RecurrentEvent, EventBreak, Base, Executor, EventOccurrence
+from src.recurrence import expand_occurrences, grouped_occurrence_intervals, horizon, materialize
+
+# Most reschedules reschedule_walk follows from an event in either direction
+RESCHEDULE_DEPTH = 1000
+
+
+def insert_returning_ids(db: Session, model: type[Base], values: list[dict]) -> list[int]:
+    """
+    Insert rows in as few statements as the driver allows and return their ids in the order of values.
+
+    SQLite can't sort RETURNING rows by parameter, which would make SQLAlchemy fall back to one INSERT per row,
+    so the returned rows are matched back to values by their inserted columns instead;
+    rows with identical values are interchangeable.
+    """
+    columns = list(values[0])
+    positions = defaultdict(deque)
+    for i, row in enumerate(values):
+        positions[tuple(row[c] for c in columns)].append(i)
+
+    ids = [0] * len(values)
+    statement = insert(model).returning(model.id, *(getattr(model, c) for c in columns))
+    for returned in db.execute(statement, values):
+        ids[positions[tuple(returned[1:])].popleft()] = returned[0]
+    return ids
 
 
 class Repository:
@@ -13,16 +41,20 @@ class Repository:
         self.db = db
         self.type_model = type_model
 
+    @instrumented
     def get(self, ident):
         return self.db.get(self.type_model, ident=ident)
 
+    @instrumented
     def all(self):
         return self.db.query(self.type_model).all()
 
+    @instrumented
     def delete(self, ident):
         obj = self.get(ident)
         if obj is None:
             return True
+        invalidate_for(obj, self.db)
         self.db.delete(obj)
         return False
 
@@ -31,6 +63,7 @@ class UserRepo(Repository):
     def __init__(self, db: Session):
         super().__init__(db, User)
 
+    @instrumented
     def new(self, name: str, role: str, is_exec: bool = False):
         user = User(name=name, role=role)
         if is_exec:
@@ -50,6 +83,19 @@ class EventRepo(Repository):
     def __init__(self, db: Session):
         super().__init__(db, Event)
 
+    @instrumented
+    def delete(self, ident):
+        """
+        Delete the event, and the series it is the template of together with their stored occurrences.
+        """
+        event = self.get(ident)
+        if event is not None:
+            for series in event.recurrences:
+                invalidate_for(series, self.db)
+                self.db.delete(series)
+        return super().delete(ident)
+
+    @instrumented
     def new(self, user: User, executor: Executor, event_type: str, start_time: time, end_time: time, day: date):
         event = Event(
             user_id=user.id,
@@ -60,14 +106,121 @@ class EventRepo(Repository):
             date=day,
             weekday=day.weekday(),
         )
+        event.sync_span()
         self.db.add(event)
+        invalidate(self.db, executor.id, day)
         return event
 
+    @instrumented
+    def new_bulk(self, rows: list[dict]) -> list[int]:
+        """
+        Insert many events in one executemany, skipping the ORM unit of work.
+        Rows carry user_id, executor_id, event_type, start_time, end_time and day; returns the new ids in row order.
+        """
+        if not rows:
+            return []
+        values = [
+            {
+                "user_id": row["user_id"],
+                "executor_id": row["executor_id"],
+                "event_type": row["event_type"],
+                "start_time": row["start_time"],
+                "end_time": row["end_time"],
+                "date": row["day"],
+                "weekday": row["day"].weekday(),
+                "start_at": datetime.combine(row["day"], row["start_time"]),
+                "end_at": datetime.combine(row["day"], row["end_time"]),
+            }
+            for row in rows
+        ]
+        for row in rows:
+            invalidate(self.db, row["executor_id"], row["day"])
+        return insert_returning_ids(self.db, Event, values)
+
+    @instrumented
+    def latest(self, ident: int) -> Event | None:
+        """
+        The event currently in effect for the booking event ident belongs to, following its reschedules.
+        """
+        return self.latest_many([ident]).get(ident)
+
+    @instrumented
+    def latest_many(self, ids: list[int]) -> dict[int, Event]:
+        """
+        latest for many events in one query, keyed by the given ids. Missing ids are left out.
+        A chain whose last reschedule_id points to a deleted event ends at the last event that still exists.
+        """
+        if not ids:
+            return {}
+        forward = reschedule_walk(ids)
+        deepest = select(forward.c.requested_id, func.max(forward.c.depth).label("depth")).group_by(
+            forward.c.requested_id
+        ).subquery()
+        rows = self.db.query(forward.c.requested_id, Event).join(Event, Event.id == forward.c.event_id).join(
+            deepest, and_(deepest.c.requested_id == forward.c.requested_id, deepest.c.depth == forward.c.depth)
+        )
+        return dict(rows.all())
+
+    @instrumented
+    def history(self, ident: int) -> list[Event]:
+        """
+        Every version of the booking event ident belongs to, from the original to the one in effect.
+        """
+        return self.history_many([ident]).get(ident, [])
+
+    @instrumented
+    def history_many(self, ids: list[int]) -> dict[int, list[Event]]:
+        """
+        history for many events in one query, keyed by the given ids. Missing ids are left out.
+        """
+        if not ids:
+            return {}
+        forward, backward = reschedule_walk(ids), reschedule_walk(ids, backward=True)
+        steps = union_all(
+            select(forward.c.requested_id, forward.c.event_id, forward.c.depth),
+            select(backward.c.requested_id, backward.c.event_id, backward.c.depth).where(backward.c.depth < 0),
+        ).subquery()
+        rows = self.db.query(steps.c.requested_id, Event).join(Event, Event.id == steps.c.event_id).order_by(
+            steps.c.requested_id, steps.c.depth
+        )
+        histories = {}
+        for requested_id, event in rows:
+            # A looping chain comes back to events it already went through
+            if event not in histories.setdefault(requested_id, []):
+                histories[requested_id].append(event)
+        return histories
+
+
+def reschedule_walk(ids: list[int], backward: bool = False) -> CTE:
+    """
+    Recursive CTE walking reschedule chains from the given events, one row per (requested_id, event_id)
+    with the event's next_id and its depth: 0 for the requested event, counting up towards its replacements,
+    or down towards the events it replaced when backward. The walk stops after RESCHEDULE_DEPTH steps,
+    so a chain looping back on itself in bad data can't recurse forever.
+    """
+    events = Event.__table__
+    walk = select(
+        events.c.id.label("requested_id"),
+        events.c.id.label("event_id"),
+        events.c.reschedule_id.label("next_id"),
+        literal(0).label("depth"),
+    ).where(events.c.id.in_(ids)).cte("reschedule_back" if backward else "reschedule_forward", recursive=True)
+    if backward:
+        step = select(walk.c.requested_id, events.c.id, events.c.reschedule_id, walk.c.depth - 1).where(
+            events.c.reschedule_id == walk.c.event_id, walk.c.depth > -RESCHEDULE_DEPTH
+        )
+    else:
+        step = select(walk.c.requested_id, events.c.id, events.c.reschedule_id, walk.c.depth + 1).where(
+            events.c.id == walk.c.next_id, walk.c.depth < RESCHEDULE_DEPTH
+        )
+    return walk.union_all(step)
+
 
 class RecurrentEventRepo(Repository):
     def __init__(self, db: Session):
         super().__init__(db, RecurrentEvent)
 
+    @instrumented
     def new(
         self,
         user: User,
@@ -78,8 +231,13 @@ class RecurrentEventRepo(Repository):
         day: date,
         interval: timedelta,
         start: datetime,
-        end: datetime | None = None
+        end: datetime | None = None,
+        materialized: bool = False,
     ):
+        """
+        With materialized set, the occurrences of the rolling horizon are stored right away, otherwise
+        EventOccurrenceRepo.roll_forward stores them on its next run.
+        """
         event = EventRepo(self.db).new(user, executor, event_type, start_time, end_time, day)
         recurrent_event = RecurrentEvent(
             user_id=user.id,
@@ -91,13 +249,98 @@ class RecurrentEventRepo(Repository):
             end=end,
         )
         self.db.add(recurrent_event)
+        if materialized:
+            materialize(recurrent_event)
+        invalidate(self.db, executor.id)
         return recurrent_event
 
+    @instrumented
+    def new_bulk(self, rows: list[dict], today: date | None = None, materialized: bool = False) -> list[int]:
+        """
+        Insert many series and their template events, and with materialized set their occurrences as well,
+        with one executemany per table, like new.
+        Rows carry the template fields of EventRepo.new_bulk plus interval, start and end; returns the new ids in row order.
+        """
+        if not rows:
+            return []
+        event_ids = EventRepo(self.db).new_bulk(rows)
+        horizon_start, until = horizon(today)
+        values = [
+            {
+                "user_id": row["user_id"],
+                "executor_id": row["executor_id"],
+                "event_id": event_id,
+                "interval": int(row["interval"].total_seconds()),
+                "start": row["start"],
+                "end": row.get("end"),
+                "materialized_until": until if materialized else None,
+            }
+            for row, event_id in zip(rows, event_ids)
+        ]
+        ids = insert_returning_ids(self.db, RecurrentEvent, values)
+
+        if materialized:
+            series = [
+                (i, v["start"], v["interval"], v["end"], row["start_time"], row["end_time"])
+                for i, (v, row) in enumerate(zip(values, rows))
+            ]
+            occurrences = [
+                {"recurrent_event_id": ids[i], "executor_id": values[i]["executor_id"],
+                 "user_id": values[i]["user_id"], "start": s, "end": e}
+                for i, found in grouped_occurrence_intervals(series, horizon_start, until).items()
+                for s, e in found
+            ]
+            if occurrences:
+                self.db.execute(insert(EventOccurrence), occurrences)
+        for executor_id in {row["executor_id"] for row in rows}:
+            invalidate(self.db, executor_id)
+        return ids
+
+
+class EventOccurrenceRepo(Repository):
+    def __init__(self, db: Session):
+        super().__init__(db, EventOccurrence)
+
+    @instrumented
+    def roll_forward(self, today: date | None = None):
+        """
+        Extend the stored occurrences of every active series up to the end of the rolling horizon
+        and delete the ones that ended before it starts, so the table holds a rolling window.
+        Series that were never materialized are expanded over the whole horizon.
+        Returns the number of occurrences inserted.
+        """
+        start, until = horizon(today)
+        self.db.execute(delete(EventOccurrence).where(EventOccurrence.end <= start))
+        schedule: list[RecurrentEvent] = self.db.query(RecurrentEvent).join(RecurrentEvent.event).options(
+            contains_eager(RecurrentEvent.event)
+        ).filter(
+            Event.cancelled == False,
+            or_(RecurrentEvent.materialized_until == None, RecurrentEvent.materialized_until < until),
+        ).all()
+
+        rows = []
+        for series in schedule:
+            if series.materialized_until is None:
+                materialize(series, today)
+                continue
+            since = max(series.materialized_until, start)
+            series.materialized_until = until
+            _, starts, ends = expand_occurrences([series], since, until)
+            rows.extend(
+                {"recurrent_event_id": series.id, "executor_id": series.executor_id,
+                 "user_id": series.user_id, "start": s, "end": e}
+                for s, e in zip(starts.tolist(), ends.tolist()) if s >= since
+            )
+        if rows:
+            self.db.execute(insert(EventOccurrence), rows)
+        return len(rows)
+
 
 class EventBreakRepo(Repository):
     def __init__(self, db: Session):
         super().__init__(db, EventBreak)
 
+    @instrumented
     def new(self, user: User, break_type: str, start: datetime, end: datetime):
         event_break = EventBreak(user_id=user.id, break_type=break_type, start=start, end=end)
         self.db.add(event_break)
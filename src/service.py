@@ -1,62 +1,283 @@
+import heapq
+import json
+import os
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from concurrent import futures
 from datetime import date, datetime, timedelta, time
+from typing import Iterator, NamedTuple
 
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import or_, select, tuple_
 
-from src.models import Event, User, Executor, RecurrentEvent
+from src.availability import free_slots, free_slot_indexes_task, free_windows, merge_intervals, overlaps
+from src.bitmap import ScheduleBitmap, GRANULARITY
+from src.cache import ScheduleCache, day_span, invalidate_for
+from src.database import begin_immediate
+from src.instrumentation import instrumented
+from src.models import Event, User, Executor, RecurrentEvent, EventOccurrence, EventBreak
+from src.recurrence import (
+    from_us, grouped_occurrence_intervals, has_occurrence_between, has_occurrence_overlapping, refresh_occurrences,
+    to_us,
+)
 from src.repositories import ExecutorRepo, EventRepo, RecurrentEventRepo
 
 
+class SlotConflictError(ValueError):
+    """The requested slot overlaps the executor's schedule."""
+
+
+class BulkResult(NamedTuple):
+    # Index of the item in the batch -> id of the new Event, or of the RecurrentEvent for items with an interval
+    created: dict[int, int]
+    # Index of the item in the batch -> why it wasn't booked
+    conflicts: dict[int, str]
+
+
+class EventPage(NamedTuple):
+    items: list[Event | RecurrentEvent]
+    # Cursor of the next page, None on the last one
+    next_cursor: str | None
+
+
+def schedule_key(row: Event | RecurrentEvent) -> tuple[datetime, int, int]:
+    """
+    Order of the event streams and pages: by start, one-off events before recurrent events starting with them,
+    then by id.
+    """
+    if isinstance(row, RecurrentEvent):
+        return row.start, 1, row.id
+    return datetime.combine(row.date, row.start_time), 0, row.id
+
+
+def encode_cursor(key: tuple[datetime, int, int]) -> str:
+    after, kind, ident = key
+    return urlsafe_b64encode(json.dumps([after.isoformat(), kind, ident]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int, int]:
+    try:
+        after, kind, ident = json.loads(urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(after), int(kind), int(ident)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor {cursor!r}") from e
+
+
+def event_overlap(start: datetime, end: datetime) -> list:
+    """
+    Filters for the events overlapping [start, end). Events last less than a day, so bounding start_at from below
+    as well lets the index search a range instead of the executor's whole history.
+    """
+    return [Event.start_at > start - timedelta(days=1), Event.start_at < end, Event.end_at > start]
+
+
+def interval_arrays(intervals: list[tuple[datetime, datetime]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (start, end) pairs as two int64 arrays of microseconds since the epoch.
+    """
+    pairs = np.array(intervals, dtype="datetime64[us]").reshape(-1, 2).astype(np.int64)
+    return pairs[:, 0].copy(), pairs[:, 1].copy()
+
+
+def slot_search_tasks(
+        executors: list[tuple[int, np.ndarray, np.ndarray]], start: int, slot_size: int, count: int, parts: int
+) -> list[tuple]:
+    """
+    Split the search of count slots for every executor into about parts tasks for free_slot_indexes_task:
+    groups of executors, and ranges of slots when there are fewer executors than parts.
+    Tasks are ordered so that concatenating the results of an executor keeps its slots in order.
+    """
+    groups = min(parts, len(executors)) or 1
+    ranges = max(parts // max(len(executors), 1), 1)
+    bounds = [count * r // ranges for r in range(ranges + 1)]
+    tasks = []
+    for g in range(groups):
+        group = executors[len(executors) * g // groups:len(executors) * (g + 1) // groups]
+        for first, stop in zip(bounds, bounds[1:]):
+            if first < stop:
+                tasks.append((start, slot_size, first, stop, group))
+    return tasks
+
+
+def merge_busy(executor_ids: list[int], *parts: dict[int, list]) -> dict[int, list[tuple[datetime, datetime]]]:
+    busy = {executor_id: [] for executor_id in executor_ids}
+    for part in parts:
+        for executor_id, intervals in part.items():
+            busy[executor_id] += intervals
+    return busy
+
+
 class EventService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, materialized: bool = False, cache: ScheduleCache | None = None):
+        """
+        With materialized set, recurrent events are read from the event_occurrences table,
+        which only covers the rolling horizon kept by EventOccurrenceRepo.roll_forward,
+        and new series store their occurrences right away instead of waiting for its next run.
+        With a cache, busy intervals are served per executor-day from it and writes through this session
+        invalidate the days they touch.
+        """
         self.db = db
+        self.materialized = materialized
+        self.cache = cache
+        if cache is not None:
+            cache.bind(db)
+
+    @instrumented
+    def events_for_day(self, day: date, executor: Executor, user: User | None = None, skip_rescheduled: bool = False):
+        """
+        With skip_rescheduled, one-off events superseded by a reschedule are left out by the query.
+        """
+        return (
+            self._one_off_events_for_day(day, executor, user, skip_rescheduled)
+            + self._recurrent_events_for_day(day, executor, user)
+        )
 
-    def events_for_day(self, day: date, executor: Executor, user: User | None = None):
+    def _one_off_events_for_day(
+            self, day: date, executor: Executor, user: User | None = None, skip_rescheduled: bool = False
+    ) -> list[Event]:
         filters = {"executor_id": executor.id, "date": day}
         if user:
             filters |= {"user_id": user.id}
-        events: list[Event] = self.db.query(Event).filter_by(cancelled=False, **filters).all()
+        if skip_rescheduled:
+            filters |= {"is_rescheduled": False}
+        return self.db.query(Event).filter_by(cancelled=False, **filters).all()
 
-        filters.pop("date")
+    def _recurrent_events_for_day(self, day: date, executor: Executor, user: User | None = None) -> list[RecurrentEvent]:
+        filters = {"executor_id": executor.id}
+        if user:
+            filters |= {"user_id": user.id}
 
         day_start, day_end = datetime.combine(day, datetime.min.time()), datetime.combine(day, datetime.max.time())
-        schedule: list[RecurrentEvent] = self.db.query(RecurrentEvent).filter_by(**filters).all()
-        recurrent_events = []
-        for re in schedule:
-            if re.get_next_occurrence(day_start, day_end):
-                recurrent_events.append(re)
-        return events + recurrent_events
-
-    def events_for_period(self, start: datetime, end: datetime, executor: Executor, user: User | None = None):
-        event_time_condition = or_(
-            (Event.date + Event.start_time) >= start,
-            (Event.date + Event.end_time) <= end
+        return self.db.query(RecurrentEvent).options(selectinload(RecurrentEvent.event)).filter_by(**filters).filter(
+            has_occurrence_between(day_start, day_end)
+        ).all()
+
+    @instrumented
+    def events_for_period(
+            self,
+            start: datetime,
+            end: datetime,
+            executor: Executor,
+            user: User | None = None,
+            skip_rescheduled: bool = False,
+    ):
+        """
+        With skip_rescheduled, one-off events superseded by a reschedule are left out by the query.
+        """
+        return (
+            self._one_off_events_for_period(start, end, executor, user, skip_rescheduled)
+            + self._recurrent_events_for_period(start, end, executor, user)
         )
+
+    def _one_off_events_for_period(
+            self,
+            start: datetime,
+            end: datetime,
+            executor: Executor,
+            user: User | None = None,
+            skip_rescheduled: bool = False,
+    ) -> list[Event]:
+        return self._one_off_period_query(start, end, executor, user, skip_rescheduled).all()
+
+    def _recurrent_events_for_period(
+            self, start: datetime, end: datetime, executor: Executor, user: User | None = None
+    ) -> list[RecurrentEvent]:
+        return self._recurrent_period_query(start, end, executor, user).all()
+
+    def _recurrent_period_query(self, start: datetime, end: datetime, executor: Executor, user: User | None = None):
+        """
+        The series with an occurrence overlapping [start, end), read from the stored occurrences when materialized.
+        """
+        filters = [RecurrentEvent.executor_id == executor.id]
         if user:
-            events = self.db.query(Event).filter(
-                Event.executor_id == executor.id,
-                Event.user_id == user.id,
-                Event.cancelled == False,
-                event_time_condition
-            ).all()
-            recurrent_events = self.db.query(RecurrentEvent).filter(
-                RecurrentEvent.executor_id == executor.id,
-                RecurrentEvent.user_id == user.id,
-                RecurrentEvent.start >= start,
-                RecurrentEvent.end <= end,
-            ).all()
+            filters.append(RecurrentEvent.user_id == user.id)
+        query = self.db.query(RecurrentEvent).options(selectinload(RecurrentEvent.event))
+        if self.materialized:
+            filters.append(RecurrentEvent.id.in_(
+                select(EventOccurrence.recurrent_event_id).where(
+                    EventOccurrence.executor_id == executor.id,
+                    EventOccurrence.start < end,
+                    EventOccurrence.end > start,
+                )
+            ))
         else:
-            events = self.db.query(Event).filter(
-                Event.executor_id == executor.id, Event.cancelled == False, event_time_condition
-            ).all()
-            recurrent_events = self.db.query(RecurrentEvent).filter(
-                RecurrentEvent.executor_id == executor.id,
-                RecurrentEvent.start >= start,
-                RecurrentEvent.end <= end,
-            ).all()
+            query = query.join(RecurrentEvent.event)
+            filters += [RecurrentEvent.start < end, has_occurrence_overlapping(start, end)]
+        return query.filter(*filters)
 
-        return events + recurrent_events
+    def iter_events_for_period(
+            self,
+            start: datetime,
+            end: datetime,
+            executor: Executor,
+            user: User | None = None,
+            batch_size: int = 1000,
+    ) -> Iterator[Event | RecurrentEvent]:
+        """
+        Stream the events overlapping [start, end) and the recurrent events of the period in schedule_key order.
+        Both tables are read through server-side cursors, batch_size rows at a time, so memory stays bounded
+        however long the window is. The session must stay open until the iterator is exhausted or closed.
+        """
+        events = self._one_off_period_query(start, end, executor, user).order_by(
+            Event.start_at, Event.id
+        ).yield_per(batch_size)
+        series = self._recurrent_period_query(start, end, executor, user).order_by(
+            RecurrentEvent.start, RecurrentEvent.id
+        ).yield_per(batch_size)
+        yield from heapq.merge(events, series, key=schedule_key)
+
+    @instrumented
+    def events_page(
+            self,
+            start: datetime,
+            end: datetime,
+            executor: Executor,
+            user: User | None = None,
+            limit: int = 100,
+            cursor: str | None = None,
+    ) -> EventPage:
+        """
+        One page of what iter_events_for_period yields. Pass the next_cursor of a page to get the following one.
+        Pages are found by keyset on indexed columns, so a late page costs as much as the first one.
+        """
+        events = self._one_off_period_query(start, end, executor, user)
+        series = self._recurrent_period_query(start, end, executor, user)
+        if cursor is not None:
+            after, kind, ident = decode_cursor(cursor)
+            if kind == 0:
+                events = events.filter(tuple_(Event.start_at, Event.id) > tuple_(after, ident))
+                series = series.filter(RecurrentEvent.start >= after)
+            else:
+                events = events.filter(Event.start_at > after)
+                series = series.filter(tuple_(RecurrentEvent.start, RecurrentEvent.id) > tuple_(after, ident))
+        events = events.order_by(Event.start_at, Event.id).limit(limit + 1).all()
+        series = series.order_by(RecurrentEvent.start, RecurrentEvent.id).limit(limit + 1).all()
+
+        items = list(heapq.merge(events, series, key=schedule_key))
+        if len(items) <= limit:
+            return EventPage(items, None)
+        return EventPage(items[:limit], encode_cursor(schedule_key(items[limit - 1])))
 
+    def _one_off_period_query(
+            self,
+            start: datetime,
+            end: datetime,
+            executor: Executor,
+            user: User | None = None,
+            skip_rescheduled: bool = False,
+    ):
+        filters = [
+            Event.executor_id == executor.id,
+            Event.cancelled == False,
+            *event_overlap(start, end),
+        ]
+        if user:
+            filters.append(Event.user_id == user.id)
+        if skip_rescheduled:
+            filters.append(Event.is_rescheduled == False)
+        return self.db.query(Event).filter(*filters)
+
+    @instrumented
     def add_event(
             self,
             user: User,
@@ -70,19 +291,108 @@ class EventService:
             end: datetime | None = None
     ):
         if not self._slot_is_free(start_time, end_time, day, executor):
-            raise ValueError("Slot is occupied")
+            raise SlotConflictError("Slot is occupied")
+        return self._book(user, executor, event_type, start_time, end_time, day, interval, start, end)
+
+    @instrumented
+    def reserve_event(
+            self,
+            user: User,
+            executor: Executor,
+            event_type: str,
+            start_time: time,
+            end_time: time,
+            day: date,
+            interval: timedelta | None = None,
+            start: datetime | None = None,
+            end: datetime | None = None
+    ):
+        """
+        Check the slot and book it as one atomic step, then commit. Raises SlotConflictError if it's taken.
+
+        The transaction starts by taking the executor's lock, so concurrent reservations for the same executor
+        queue up behind each other instead of both passing the check: BEGIN IMMEDIATE on SQLite, on any engine
+        (see database.begin_immediate), a row lock on the executor (SELECT ... FOR UPDATE) where the database has
+        row locks, which leaves other executors free to book in parallel. The check always reads the database, never the cache.
+        Because it owns its transaction, the session must not be in one already.
+        """
+        if self.db.in_transaction():
+            raise RuntimeError("reserve_event runs its own transaction, commit or roll back the session first")
+        begin_immediate(self.db)
+        try:
+            self.db.execute(select(Executor.id).where(Executor.id == executor.id).with_for_update())
+            if not self._slot_is_free(start_time, end_time, day, executor, cached=False):
+                raise SlotConflictError("Slot is occupied")
+            event = self._book(user, executor, event_type, start_time, end_time, day, interval, start, end)
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            raise
+        return event
+
+    def _book(self, user, executor, event_type, start_time, end_time, day, interval, start, end):
         if interval:
             return RecurrentEventRepo(self.db).new(
-                user, executor, event_type, start_time, end_time, day, interval, start, end
+                user, executor, event_type, start_time, end_time, day, interval, start, end, self.materialized
             )
         return EventRepo(self.db).new(user, executor, event_type, start_time, end_time, day)
 
+    @instrumented
+    def add_events_bulk(self, items: list[dict]) -> BulkResult:
+        """
+        Book many events at once. Each item holds the keyword arguments of add_event.
+
+        The whole batch is checked in one pass: items are sorted by executor and start, then tested against
+        the executor's merged schedule and against the items already accepted before them, so of two colliding
+        items the earlier one wins. Conflicting items are reported by their index, the rest are bulk inserted.
+        """
+        result = BulkResult({}, {})
+        if not items:
+            return result
+
+        slots = [(datetime.combine(i["day"], i["start_time"]), datetime.combine(i["day"], i["end_time"])) for i in items]
+        executor_ids = list({i["executor"].id for i in items})
+        busy = self._busy_intervals_many(executor_ids, min(s for s, _ in slots), max(e for _, e in slots))
+        schedule = {executor_id: merge_intervals(intervals) for executor_id, intervals in busy.items()}
+
+        accepted_until = {}
+        one_off, recurrent = [], []
+        for index in sorted(range(len(items)), key=lambda i: (items[i]["executor"].id, slots[i], i)):
+            item = items[index]
+            executor_id = item["executor"].id
+            start, end = slots[index]
+            if overlaps(schedule[executor_id], start, end):
+                result.conflicts[index] = "Slot is occupied"
+                continue
+            if executor_id in accepted_until and start < accepted_until[executor_id]:
+                result.conflicts[index] = "Slot collides with another event of the batch"
+                continue
+            accepted_until[executor_id] = max(accepted_until.get(executor_id, end), end)
+            (recurrent if item.get("interval") else one_off).append(index)
+
+        def rows(indexes: list[int]) -> list[dict]:
+            return [
+                {**items[i], "user_id": items[i]["user"].id, "executor_id": items[i]["executor"].id}
+                for i in indexes
+            ]
+
+        result.created.update(zip(one_off, EventRepo(self.db).new_bulk(rows(one_off))))
+        result.created.update(zip(
+            recurrent, RecurrentEventRepo(self.db).new_bulk(rows(recurrent), materialized=self.materialized)
+        ))
+        return result
+
     @staticmethod
+    @instrumented
     def cancel_event(event: Event):
         event.cancelled = True
+        for series in event.recurrences:
+            refresh_occurrences(series)
+        invalidate_for(event)
         return event
 
     @staticmethod
+    @instrumented
     def move_event(
             event: Event | RecurrentEvent,
             new_st: time | None = None,
@@ -96,46 +406,275 @@ class EventService:
             if isinstance(event, Event):
                 event.start_time = new_st
                 event.end_time = new_et
+                event.sync_span()
+                for series in event.recurrences:
+                    refresh_occurrences(series)
+                invalidate_for(event)
                 return event
             event.event.start_time = new_st
             event.event.end_time = new_et
+            event.event.sync_span()
 
-        event.interval = new_interval if new_interval else event.interval
+        event.interval = int(new_interval.total_seconds()) if new_interval else event.interval
         event.start = new_start if new_start else event.start
         event.end = new_end if new_end else event.end
         if new_start or new_end:
             assert event.start < event.end
+        refresh_occurrences(event)
+        invalidate_for(event)
         return event
 
     @staticmethod
     def _get_available_slots(start: datetime, end: datetime, slot_size: timedelta, events: list):
-        # Generate all slots
-        all_slots = []
-        current_slot = start
-
-        while current_slot + slot_size <= end:
-            all_slots.append((current_slot, current_slot + slot_size))
-            current_slot += slot_size  # Move to the next slot
-
-        # Function to check if a slot overlaps with any occupied period
-        def is_occupied(slot):
-            slot_start, slot_end = slot
-            for occupied in events:
-                occupied_start, occupied_end = occupied
-                if not (slot_end <= occupied_start or slot_start >= occupied_end):
-                    return True  # The slot is occupied
-            return False  # The slot is available
-
-        # Filter out occupied slots
-        return [slot for slot in all_slots if not is_occupied(slot)]
+        return list(free_slots(start, end, slot_size, events))
 
+    @instrumented
     def available_slots(self, executor: Executor, start: datetime, end: datetime, slot_size: timedelta):
-        events = self.events_for_period(start, end, executor)
-        busy_slots = [(datetime.combine(e.date, e.start_time), datetime.combine(e.date, e.end_time)) for e in events]
-        return self._get_available_slots(start, end, slot_size, busy_slots)
+        return list(self.iter_available_slots(executor, start, end, slot_size))
+
+    def iter_available_slots(self, executor: Executor, start: datetime, end: datetime, slot_size: timedelta):
+        return free_slots(start, end, slot_size, self._busy_intervals(executor, start, end))
+
+    @instrumented
+    def available_slots_many(
+            self, executors: list[Executor], start: datetime, end: datetime, slot_size: timedelta
+    ) -> dict[int, list[tuple[datetime, datetime]]]:
+        """
+        Available slots of several executors at once, keyed by executor id.
+        Busy data of all executors is fetched with the same number of queries as for a single one.
+        """
+        busy = self._busy_intervals_many([e.id for e in executors], start, end)
+        return {e.id: list(free_slots(start, end, slot_size, busy[e.id])) for e in executors}
+
+    @instrumented
+    def available_slots_parallel(
+            self,
+            executors: list[Executor],
+            start: datetime,
+            end: datetime,
+            slot_size: timedelta,
+            workers: int | None = None,
+            pool: futures.Executor | None = None,
+    ) -> dict[int, list[tuple[datetime, datetime]]]:
+        """
+        available_slots_many for large batches, with the same result. Busy data is fetched once, then the slot
+        search is split by executor, and by date range when there are fewer executors than workers, over a
+        process pool. Workers get int64 microsecond arrays and return slot indexes, never ORM objects.
 
-    def _slot_is_free(self, start_time: time, end_time: time, day: date, executor: Executor):
+        Pass a pool to reuse it across calls, otherwise one of workers processes (all cores by default) is
+        started for the call. With workers=1 and no pool the search runs in this process.
+        """
+        if slot_size <= timedelta():
+            raise ValueError("slot_size must be positive")
+        executor_ids = [e.id for e in executors]
+        busy = self._busy_intervals_many(executor_ids, start, end)
+        start_us, slot_us = to_us(start), slot_size // timedelta(microseconds=1)
+        count = max((end - start) // slot_size, 0)
+        workers = workers or os.cpu_count() or 1
+        tasks = slot_search_tasks(
+            [(executor_id, *interval_arrays(busy[executor_id])) for executor_id in executor_ids],
+            start_us, slot_us, count, parts=workers * 4,
+        )
+
+        if pool is not None:
+            results = list(pool.map(free_slot_indexes_task, tasks))
+        elif workers == 1:
+            results = list(map(free_slot_indexes_task, tasks))
+        else:
+            with futures.ProcessPoolExecutor(workers) as own_pool:
+                results = list(own_pool.map(free_slot_indexes_task, tasks))
+
+        indexes = {executor_id: [] for executor_id in executor_ids}
+        for part in results:
+            for executor_id, found in part:
+                indexes[executor_id].append(found)
+        slots = {}
+        for executor_id, parts in indexes.items():
+            starts = start_us + np.concatenate(parts) * slot_us if parts else np.array([], dtype=np.int64)
+            slots[executor_id] = list(zip(from_us(starts), from_us(starts + slot_us)))
+        return slots
+
+    @instrumented
+    def schedule_bitmaps(
+            self, executors: list[Executor], first_day: date, days: int = 1, granularity: timedelta = GRANULARITY
+    ) -> dict[int, ScheduleBitmap]:
+        """
+        Busy bitmaps of several executors over days starting at first_day, keyed by executor id.
+        Unlike available_slots, the breaks of the executor's users count as busy time.
+        """
+        executor_ids = [e.id for e in executors]
+        start, end = day_span(first_day)[0], day_span(first_day + timedelta(days=days - 1))[1]
+        busy = merge_busy(
+            executor_ids, self._busy_intervals_many(executor_ids, start, end), self._break_busy(executor_ids, start, end)
+        )
+        return {
+            executor_id: ScheduleBitmap.from_intervals(intervals, first_day, days, granularity)
+            for executor_id, intervals in busy.items()
+        }
+
+    @instrumented
+    def available_slots_bitmap(
+            self, executor: Executor, start: datetime, end: datetime, slot_size: timedelta,
+            granularity: timedelta = GRANULARITY,
+    ) -> list[tuple[datetime, datetime]]:
+        """
+        Available slots searched on the executor's schedule bitmap, breaks included.
+        """
+        days = ((end - timedelta.resolution).date() - start.date()).days + 1
+        bitmap = self.schedule_bitmaps([executor], start.date(), max(days, 1), granularity)[executor.id]
+        return bitmap.free_slots(start, end, slot_size)
+
+    @instrumented
+    def common_free_slots(
+            self, participants: list[Executor | User], start: datetime, end: datetime, duration: timedelta
+    ) -> list[tuple[datetime, datetime]]:
+        """
+        Windows within [start, end) lasting at least duration in which every participant is free.
+
+        An executor is busy with its events, its recurrent events and the breaks of its users; a user is busy
+        with the events booked for them and their own breaks. Busy data of all participants is fetched in
+        a few queries and merged in one pass.
+        """
+        executor_ids = [p.id for p in participants if isinstance(p, Executor)]
+        user_ids = [p.id for p in participants if isinstance(p, User)]
+        parts = []
+        if executor_ids:
+            parts += [
+                self._busy_intervals_many(executor_ids, start, end),
+                self._break_busy(executor_ids, start, end),
+            ]
+        if user_ids:
+            parts += [
+                self._one_off_busy(user_ids, start, end, by="user_id"),
+                self._recurrent_busy(user_ids, start, end, by="user_id"),
+                self._break_busy(user_ids, start, end, by="user_id"),
+            ]
+        busy = [interval for part in parts for intervals in part.values() for interval in intervals]
+        return free_windows(start, end, duration, busy)
+
+    @instrumented
+    def busy_for_day(self, day: date, executor: Executor) -> list[tuple[datetime, datetime]]:
+        """
+        Busy (start, end) pairs of the executor overlapping the day, served from the cache when there is one.
+        """
+        return self._busy_intervals(executor, *day_span(day))
+
+    def _busy_intervals(self, executor: Executor, start: datetime, end: datetime):
+        return self._busy_intervals_many([executor.id], start, end)[executor.id]
+
+    def _busy_intervals_many(self, executor_ids: list[int], start: datetime, end: datetime):
+        """
+        Busy (start, end) pairs of every executor overlapping [start, end), keyed by executor id:
+        one-off events plus the expanded occurrences of recurrent events.
+        """
+        if self.cache is not None:
+            return self._cached_busy_intervals(executor_ids, start, end)
+        return self._fetch_busy_intervals(executor_ids, start, end)
+
+    def _cached_busy_intervals(self, executor_ids: list[int], start: datetime, end: datetime):
+        """
+        Assembles the window from cached executor-days. Missing days are fetched together in one window
+        covering all of them and stored per day; a warm read issues no query.
+        """
+        last_day = (end - timedelta.resolution).date()
+        days = [start.date() + timedelta(days=i) for i in range((last_day - start.date()).days + 1)]
+        busy = {executor_id: {} for executor_id in executor_ids}
+        missing = {}
+        for executor_id in executor_ids:
+            for day in days:
+                intervals = self.cache.get(executor_id, day)
+                if intervals is None:
+                    missing.setdefault(executor_id, []).append(day)
+                else:
+                    busy[executor_id].update(dict.fromkeys(intervals))
+
+        if missing:
+            generations = {executor_id: self.cache.generation(executor_id) for executor_id in missing}
+            first = min(d for missing_days in missing.values() for d in missing_days)
+            last = max(d for missing_days in missing.values() for d in missing_days)
+            fetched = self._fetch_busy_intervals(list(missing), day_span(first)[0], day_span(last)[1])
+            for executor_id, missing_days in missing.items():
+                for day in missing_days:
+                    day_start, day_end = day_span(day)
+                    intervals = [i for i in fetched[executor_id] if i[0] < day_end and i[1] > day_start]
+                    self.cache.put(executor_id, day, intervals, generations[executor_id])
+                    busy[executor_id].update(dict.fromkeys(intervals))
+        return {executor_id: list(intervals) for executor_id, intervals in busy.items()}
+
+    def _fetch_busy_intervals(self, executor_ids: list[int], start: datetime, end: datetime):
+        return merge_busy(
+            executor_ids,
+            self._one_off_busy(executor_ids, start, end),
+            self._recurrent_busy(executor_ids, start, end),
+        )
+
+    def _one_off_busy(self, ids: list[int], start: datetime, end: datetime, by: str = "executor_id"):
+        """
+        Busy intervals of one-off events keyed by executor id, or by user id with by="user_id".
+        _recurrent_busy and _break_busy take the same arguments.
+        """
+        key = getattr(Event, by)
+        busy = {}
+        events = self.db.query(key, Event.start_at, Event.end_at).filter(
+            key.in_(ids),
+            *event_overlap(start, end),
+            Event.cancelled == False,
+        ).all()
+        for owner_id, event_start, event_end in events:
+            busy.setdefault(owner_id, []).append((event_start, event_end))
+        return busy
+
+    def _recurrent_busy(self, ids: list[int], start: datetime, end: datetime, by: str = "executor_id"):
+        if self.materialized:
+            key = getattr(EventOccurrence, by)
+            busy = {}
+            occurrences = self.db.query(key, EventOccurrence.start, EventOccurrence.end).filter(
+                key.in_(ids),
+                EventOccurrence.start < end,
+                EventOccurrence.end > start,
+            ).all()
+            for owner_id, occurrence_start, occurrence_end in occurrences:
+                busy.setdefault(owner_id, []).append((occurrence_start, occurrence_end))
+            return busy
+
+        # Occurrences last less than a day, so older series can't reach into the window
+        key = getattr(RecurrentEvent, by)
+        series = self.db.query(
+            key, RecurrentEvent.start, RecurrentEvent.interval, RecurrentEvent.end,
+            Event.start_time, Event.end_time,
+        ).join(RecurrentEvent.event).filter(
+            key.in_(ids),
+            RecurrentEvent.start < end,
+            Event.cancelled == False,
+            or_(RecurrentEvent.end == None, RecurrentEvent.end > start - timedelta(days=1)),
+        ).all()
+        return grouped_occurrence_intervals(series, start, end)
+
+    def _break_busy(self, ids: list[int], start: datetime, end: datetime, by: str = "executor_id"):
+        """
+        Breaks are taken by users: an executor's breaks are those of the users working as that executor.
+        """
+        if by == "executor_id":
+            key = User.executor_id
+            query = self.db.query(key, EventBreak.start, EventBreak.end).join(EventBreak.user)
+        else:
+            key = EventBreak.user_id
+            query = self.db.query(key, EventBreak.start, EventBreak.end)
+        busy = {}
+        breaks = query.filter(
+            key.in_(ids),
+            EventBreak.start < end,
+            EventBreak.end > start,
+        ).all()
+        for owner_id, break_start, break_end in breaks:
+            busy.setdefault(owner_id, []).append((break_start, break_end))
+        return busy
+
+    def _slot_is_free(self, start_time: time, end_time: time, day: date, executor: Executor, cached: bool = True):
         start = datetime.combine(day, start_time)
         end = datetime.combine(day, end_time)
-        events = self.events_for_period(start, end, executor)
-        return not bool(events)
\ No newline at end of file
+        if cached:
+            busy = self._busy_intervals(executor, start, end)
+        else:
+            busy = self._fetch_busy_intervals([executor.id], start, end)[executor.id]
+        return not overlaps(merge_intervals(busy), start, end)
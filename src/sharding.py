@@ -0,0 +1,255 @@
+"""
+Executor sharding: the schedule of executor e lives in database e.id % N, so writes for executors on different
+shards don't contend for one lock.
+
+Executor ids encode their shard and are allocated by ShardRouter.new_executor. Users are reference data and are
+copied to every shard with the same id by ShardRouter.new_user. Event and series ids are only unique within a
+shard: refer to them together with their executor.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Callable, Iterator, TypeVar
+
+from sqlalchemy import Engine, func, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.database import make_engine, make_session_factory, init_db, unit_of_work
+from src.models import Event, User, Executor, RecurrentEvent
+from src.service import EventService, BulkResult
+
+T = TypeVar("T")
+
+
+class ShardRouter:
+    def __init__(self, engines: list[Engine]):
+        if not engines:
+            raise ValueError("A router needs at least one shard")
+        self.engines = engines
+        self.session_factories: list[sessionmaker[Session]] = [make_session_factory(e) for e in engines]
+        self._pool = ThreadPoolExecutor(len(engines), thread_name_prefix="shard")
+        self._next_shard = 0
+
+    @classmethod
+    def from_urls(cls, urls: list[str], **engine_kwargs) -> "ShardRouter":
+        return cls([make_engine(url, **engine_kwargs) for url in urls])
+
+    @classmethod
+    def sqlite_files(cls, directory: str | Path, shards: int, **engine_kwargs) -> "ShardRouter":
+        """
+        One SQLite file per shard, shard-0.sqlite ... shard-{N-1}.sqlite in directory.
+        """
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        return cls.from_urls(
+            [f"sqlite:///{Path(directory) / f'shard-{i}.sqlite'}" for i in range(shards)], **engine_kwargs
+        )
+
+    def __len__(self):
+        return len(self.engines)
+
+    def shard_for(self, executor_id: int) -> int:
+        return executor_id % len(self.engines)
+
+    def session(self, executor_id: int) -> Session:
+        """
+        A new session on the shard of the executor. The caller commits and closes it.
+        """
+        return self.session_factories[self.shard_for(executor_id)]()
+
+    @contextmanager
+    def unit_of_work(self, executor_id: int) -> Iterator[Session]:
+        """
+        database.unit_of_work on the shard of the executor, e.g. for repositories:
+
+            with router.unit_of_work(executor.id) as db:
+                EventRepo(db).new(...)
+        """
+        with unit_of_work(self.session_factories[self.shard_for(executor_id)]) as db:
+            yield db
+
+    def fan_out(self, call: Callable[[Session, int], T], shards: list[int] | None = None) -> list[T]:
+        """
+        Run call(session, shard) on every shard, or on the given ones, in parallel; results in shard order.
+        Each call gets its own session, closed afterwards; it commits itself if it writes.
+        """
+        def run(shard: int) -> T:
+            with self.session_factories[shard]() as db:
+                return call(db, shard)
+
+        return list(self._pool.map(run, range(len(self.engines)) if shards is None else shards))
+
+    def init_db(self) -> list[bool]:
+        return list(self._pool.map(init_db, self.engines))
+
+    def new_executor(self, shard: int | None = None) -> Executor:
+        """
+        Create an executor on the given shard, or on the next one round robin. Its id is the smallest one
+        above the shard's current ids that routes back to it.
+        """
+        if shard is None:
+            shard, self._next_shard = self._next_shard, (self._next_shard + 1) % len(self.engines)
+        with self.session_factories[shard].begin() as db:
+            db.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+            highest = db.scalar(select(func.max(Executor.id))) or 0
+            ident = highest + 1 + (shard - highest - 1) % len(self.engines)
+            executor = Executor(id=ident)
+            db.add(executor)
+        return executor
+
+    def new_user(self, name: str, role: str, executor_id: int | None = None) -> User:
+        """
+        Create a user on every shard with the same id, allocated by shard 0. Not atomic across shards.
+        """
+        with self.session_factories[0].begin() as db:
+            user = User(name=name, role=role, executor_id=executor_id)
+            db.add(user)
+            db.flush()
+        row = {"id": user.id, "name": name, "role": role, "executor_id": executor_id}
+
+        def copy(db: Session, shard: int):
+            db.execute(insert(User), [row])
+            db.commit()
+
+        self.fan_out(copy, list(range(1, len(self.engines))))
+        return user
+
+    def executors(self) -> list[Executor]:
+        return sorted(
+            (e for found in self.fan_out(lambda db, shard: db.query(Executor).all()) for e in found),
+            key=lambda e: e.id,
+        )
+
+    def close(self):
+        self._pool.shutdown()
+        for engine in self.engines:
+            engine.dispose()
+
+
+class ShardedEventService:
+    """
+    EventService over a ShardRouter. Every call runs in a session of the executor's shard, committed when the
+    call writes; calls spanning several executors fan out to their shards in parallel. Returned rows are
+    detached, with the attributes they were loaded with.
+    """
+
+    def __init__(self, router: ShardRouter, materialized: bool = False):
+        self.router = router
+        self.materialized = materialized
+
+    def _read(self, executor_id: int, method: str, *args, **kwargs):
+        with self.router.session(executor_id) as db:
+            return getattr(EventService(db, self.materialized), method)(*args, **kwargs)
+
+    def _write(self, executor_id: int, method: str, *args, **kwargs):
+        with self.router.unit_of_work(executor_id) as db:
+            return getattr(EventService(db, self.materialized), method)(*args, **kwargs)
+
+    def _by_shard(self, executor_ids: list[int]) -> dict[int, list[int]]:
+        shards = {}
+        for executor_id in executor_ids:
+            shards.setdefault(self.router.shard_for(executor_id), []).append(executor_id)
+        return shards
+
+    def events_for_day(self, day: date, executor: Executor, user: User | None = None, skip_rescheduled: bool = False):
+        return self._read(executor.id, "events_for_day", day, executor, user, skip_rescheduled)
+
+    def events_for_period(
+            self,
+            start: datetime,
+            end: datetime,
+            executor: Executor,
+            user: User | None = None,
+            skip_rescheduled: bool = False,
+    ):
+        return self._read(executor.id, "events_for_period", start, end, executor, user, skip_rescheduled)
+
+    def add_event(
+            self,
+            user: User,
+            executor: Executor,
+            event_type: str,
+            start_time: time,
+            end_time: time,
+            day: date,
+            interval: timedelta | None = None,
+            start: datetime | None = None,
+            end: datetime | None = None
+    ):
+        return self._write(
+            executor.id, "add_event", user, executor, event_type, start_time, end_time, day, interval, start, end
+        )
+
+    def reserve_event(
+            self,
+            user: User,
+            executor: Executor,
+            event_type: str,
+            start_time: time,
+            end_time: time,
+            day: date,
+            interval: timedelta | None = None,
+            start: datetime | None = None,
+            end: datetime | None = None
+    ):
+        with self.router.session(executor.id) as db:
+            return EventService(db, self.materialized).reserve_event(
+                user, executor, event_type, start_time, end_time, day, interval, start, end
+            )
+
+    def add_events_bulk(self, items: list[dict]) -> BulkResult:
+        """
+        EventService.add_events_bulk run on every shard of the batch in parallel, with item indexes of the
+        whole batch in the result.
+        """
+        indexes = {}
+        for index, item in enumerate(items):
+            indexes.setdefault(self.router.shard_for(item["executor"].id), []).append(index)
+
+        def book(db: Session, shard: int) -> BulkResult:
+            result = EventService(db, self.materialized).add_events_bulk([items[i] for i in indexes[shard]])
+            db.commit()
+            return result
+
+        result = BulkResult({}, {})
+        for shard, part in zip(indexes, self.router.fan_out(book, list(indexes))):
+            result.created.update((indexes[shard][i], ident) for i, ident in part.created.items())
+            result.conflicts.update((indexes[shard][i], reason) for i, reason in part.conflicts.items())
+        return result
+
+    def cancel_event(self, event: Event):
+        with self.router.unit_of_work(event.executor_id) as db:
+            return EventService.cancel_event(db.get(Event, event.id))
+
+    def move_event(
+            self,
+            event: Event | RecurrentEvent,
+            new_st: time | None = None,
+            new_et: time | None = None,
+            new_interval: timedelta | None = None,
+            new_start: datetime | None = None,
+            new_end: datetime | None = None
+    ):
+        with self.router.unit_of_work(event.executor_id) as db:
+            return EventService.move_event(
+                db.get(type(event), event.id), new_st, new_et, new_interval, new_start, new_end
+            )
+
+    def available_slots(self, executor: Executor, start: datetime, end: datetime, slot_size: timedelta):
+        return self._read(executor.id, "available_slots", executor, start, end, slot_size)
+
+    def available_slots_many(
+            self, executors: list[Executor], start: datetime, end: datetime, slot_size: timedelta
+    ) -> dict[int, list[tuple[datetime, datetime]]]:
+        by_id = {e.id: e for e in executors}
+        shards = self._by_shard(list(by_id))
+
+        def search(db: Session, shard: int):
+            return EventService(db, self.materialized).available_slots_many(
+                [by_id[i] for i in shards[shard]], start, end, slot_size
+            )
+
+        slots = {}
+        for part in self.router.fan_out(search, list(shards)):
+            slots.update(part)
+        return {e.id: slots[e.id] for e in executors}
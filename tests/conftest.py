@@ -1,8 +1,10 @@
+from contextlib import contextmanager
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
-from src.models import Base
+from src.models import Base, Executor, User
 from src.service import EventService
 
 # Use SQLite in-memory database for testing
@@ -33,3 +35,55 @@ def event_service(db_session):
     """Provides an instance of EventService."""
     return EventService(db_session)
 
+
+@pytest.fixture
+def create_user_and_executor():
+    """
+    Factory adding an executor and a user bound to it through the given session, then committing:
+
+        user, executor = create_user_and_executor(db_session, "Alice")
+
+    Async tests pass it to AsyncSession.run_sync.
+    """
+    def create(session, name="Default User", role="teacher"):
+        executor = Executor()
+        session.add(executor)
+        session.flush()
+        user = User(name=name, role=role, executor_id=executor.id)
+        session.add(user)
+        session.commit()
+        return user, executor
+
+    return create
+
+
+@pytest.fixture
+def sql_statements():
+    """Collects (statement, parameters) for every SQL statement sent to the test engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def assert_queries(sql_statements):
+    """
+    Context manager pinning the number of SQL statements issued inside its block:
+
+        with assert_queries(2):
+            event_service.available_slots(...)
+    """
+    @contextmanager
+    def assert_queries(expected: int):
+        first = len(sql_statements)
+        yield
+        issued = [statement for statement, _ in sql_statements[first:]]
+        assert len(issued) == expected, \
+            f"expected {expected} statements, got {len(issued)}:\n" + "\n---\n".join(issued)
+
+    return assert_queries
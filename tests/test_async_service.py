@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, date, time, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.async_repositories import AsyncEventRepo, AsyncRecurrentEventRepo, AsyncUserRepo
+from src.async_service import AsyncEventService
+from src.models import Base
+
+
+@pytest.fixture
+def async_db(tmp_path):
+    """An aiosqlite engine on a temporary file, so concurrent reader sessions see the same data."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}")
+
+    async def create_schema():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_schema())
+    yield engine, async_sessionmaker(engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def test_async_booking_flow(async_db, create_user_and_executor):
+    """Ensures the async service books, detects collisions, cancels and computes slots like the sync one."""
+    _, sessions = async_db
+
+    async def scenario():
+        async with sessions() as session:
+            service = AsyncEventService(session)
+            user, executor = await session.run_sync(create_user_and_executor, "Alice")
+            today = date.today()
+
+            event = await service.add_event(user, executor, "Math", time(10, 0), time(11, 0), today)
+            await service.add_event(
+                user, executor, "Weekly Math", time(14, 0), time(15, 0), today,
+                interval=timedelta(days=7), start=datetime.combine(today, time(14, 0)),
+            )
+            await session.commit()
+
+            with pytest.raises(ValueError):
+                await service.add_event(user, executor, "Art", time(10, 30), time(11, 30), today)
+
+            slots = await service.available_slots(
+                executor, datetime.combine(today, time(9)), datetime.combine(today, time(16)), timedelta(hours=1)
+            )
+            assert [(s.time(), e.time()) for s, e in slots] == [
+                (time(9), time(10)), (time(11), time(12)), (time(12), time(13)), (time(13), time(14)),
+                (time(15), time(16)),
+            ]
+
+            event.is_rescheduled = True
+            await session.commit()
+            period = await service.events_for_period(
+                datetime.combine(today, time.min), datetime.combine(today, time.max), executor, skip_rescheduled=True
+            )
+            assert event not in period
+            assert "Math" not in [
+                e.event_type for e in await service.events_for_day(today, executor, skip_rescheduled=True)
+            ]
+            assert "Math" in [e.event_type for e in await service.events_for_day(today, executor)]
+
+            await service.move_event(event, new_st=time(12, 0), new_et=time(13, 0))
+            await service.cancel_event(event)
+            await session.commit()
+            assert [e.event_type for e in await service.events_for_day(today, executor)] == ["Weekly Math"]
+
+    asyncio.run(scenario())
+
+
+def test_async_concurrent_readers(async_db, create_user_and_executor):
+    """Ensures reads split over reader sessions give the same results as reads on the main session."""
+    _, sessions = async_db
+
+    async def scenario():
+        async with sessions() as session:
+            user, executor = await session.run_sync(create_user_and_executor, "Bob")
+            for hour in (9, 11, 13):
+                await AsyncEventRepo(session).new(user, executor, "Lesson", time(hour), time(hour + 1), date.today())
+            await session.commit()
+
+            sequential = AsyncEventService(session)
+            concurrent = AsyncEventService(session, readers=sessions)
+            start = datetime.combine(date.today(), time(8))
+            end = start + timedelta(hours=8)
+
+            assert [e.id for e in await concurrent.events_for_day(date.today(), executor)] == \
+                [e.id for e in await sequential.events_for_day(date.today(), executor)]
+            assert await concurrent.available_slots_many([executor], start, end, timedelta(minutes=30)) == \
+                await sequential.available_slots_many([executor], start, end, timedelta(minutes=30))
+            assert len(await AsyncUserRepo(session).all()) == 1
+
+    asyncio.run(scenario())
+
+
+def test_async_delete_goes_through_the_sync_repository(async_db, create_user_and_executor):
+    """Ensures deleting a template event through the async repository deletes its series too."""
+    _, sessions = async_db
+
+    async def scenario():
+        async with sessions() as session:
+            user, executor = await session.run_sync(create_user_and_executor, "Carol")
+            today = date.today()
+            series = await AsyncRecurrentEventRepo(session).new(
+                user, executor, "Weekly Math", time(14, 0), time(15, 0), today, timedelta(days=7),
+                datetime.combine(today, time(14, 0)),
+            )
+            await session.commit()
+
+            assert await AsyncEventRepo(session).delete(series.event_id) is False
+            await session.commit()
+            assert await AsyncRecurrentEventRepo(session).all() == []
+            assert await AsyncEventRepo(session).delete(series.event_id) is True
+
+    asyncio.run(scenario())
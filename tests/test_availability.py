@@ -0,0 +1,100 @@
+import random
+from datetime import datetime, timedelta
+from itertools import islice
+
+import numpy as np
+
+from src.availability import free_slots, free_windows, free_slot_indexes
+
+
+def quadratic_available_slots(start, end, slot_size, events):
+    """The original slots x events scan, kept as the reference implementation."""
+    all_slots = []
+    current_slot = start
+    while current_slot + slot_size <= end:
+        all_slots.append((current_slot, current_slot + slot_size))
+        current_slot += slot_size
+
+    def is_occupied(slot):
+        slot_start, slot_end = slot
+        for occupied_start, occupied_end in events:
+            if not (slot_end <= occupied_start or slot_start >= occupied_end):
+                return True
+        return False
+
+    return [slot for slot in all_slots if not is_occupied(slot)]
+
+
+def random_events(rng, start, span_minutes, count):
+    events = []
+    for _ in range(count):
+        event_start = start + timedelta(minutes=rng.randint(-60, span_minutes + 60))
+        # Includes empty and inverted intervals, the reference handles them too
+        event_end = event_start + timedelta(minutes=rng.randint(-30, 240))
+        events.append((event_start, event_end))
+    return events
+
+
+def test_free_slots_matches_quadratic_scan():
+    """Ensures the sweep-line engine gives exactly the same slots as the original scan."""
+    rng = random.Random(42)
+    for _ in range(500):
+        start = datetime(2024, 1, 1, rng.randint(0, 23), rng.choice([0, 7, 15, 30]))
+        span_minutes = rng.randint(0, 3 * 24 * 60)
+        end = start + timedelta(minutes=span_minutes)
+        slot_size = timedelta(minutes=rng.choice([1, 5, 15, 25, 30, 60, 90]))
+        events = random_events(rng, start, span_minutes, rng.randint(0, 40))
+
+        assert list(free_slots(start, end, slot_size, events)) == \
+            quadratic_available_slots(start, end, slot_size, events)
+
+
+def test_free_slots_no_events():
+    """Ensures every slot of the grid is free when nothing is booked."""
+    start = datetime(2024, 1, 1, 9)
+    slots = list(free_slots(start, start + timedelta(hours=2), timedelta(minutes=45), []))
+    assert slots == [
+        (start, start + timedelta(minutes=45)),
+        (start + timedelta(minutes=45), start + timedelta(minutes=90)),
+    ]
+
+
+def test_free_slots_is_lazy():
+    """Ensures callers that need only the first slots don't pay for the whole grid."""
+    start = datetime(2024, 1, 1)
+    slots = free_slots(start, start + timedelta(days=10_000), timedelta(minutes=15), [])
+    assert len(list(islice(slots, 3))) == 3
+
+
+def test_free_windows():
+    """Ensures free windows skip overlapping and out-of-range busy intervals and are at least the minimum length."""
+    start = datetime(2024, 1, 1, 8)
+    at = lambda hours: start + timedelta(hours=hours)
+    busy = [(at(1), at(2)), (at(1.5), at(3)), (at(-1), at(0.5)), (at(5), at(5)), (at(9), at(12))]
+    assert free_windows(start, at(10), timedelta(hours=1), busy) == [(at(3), at(9))]
+    assert free_windows(start, at(10), timedelta(minutes=30), busy) == [(at(0.5), at(1)), (at(3), at(9))]
+    assert free_windows(start, at(10), timedelta(hours=1), []) == [(start, at(10))]
+
+
+def test_free_slot_indexes_match_free_slots():
+    """Ensures the vectorized search on microseconds gives the same slots as free_slots, on any slot range."""
+    rng = random.Random(3)
+    us = timedelta(microseconds=1)
+    for _ in range(300):
+        start = datetime(2024, 1, 1, rng.randint(0, 23), rng.choice([0, 7, 15, 30]))
+        span_minutes = rng.randint(0, 3 * 24 * 60)
+        end = start + timedelta(minutes=span_minutes)
+        slot_size = timedelta(minutes=rng.choice([1, 5, 15, 25, 30, 60, 90]))
+        events = random_events(rng, start, span_minutes, rng.randint(0, 40))
+        count = (end - start) // slot_size
+        first = rng.randint(0, count)
+        stop = rng.randint(first, count)
+
+        window = (start + first * slot_size, start + stop * slot_size)
+        expected = [s for s, _ in free_slots(start, end, slot_size, events) if window[0] <= s < window[1]]
+        indexes = free_slot_indexes(
+            0, slot_size // us, first, stop,
+            np.array([(s - start) // us for s, _ in events], dtype=np.int64),
+            np.array([(e - start) // us for _, e in events], dtype=np.int64),
+        )
+        assert [start + int(k) * slot_size for k in indexes] == expected
@@ -0,0 +1,104 @@
+import threading
+from datetime import datetime, date, time, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from src.availability import merge_intervals
+from src.batching import BookingQueue
+from src.database import make_engine, make_session_factory
+from src.models import Base, Event, RecurrentEvent
+from src.service import EventService, SlotConflictError
+
+THREADS = 8
+BOOKINGS = 20
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'db.sqlite'}", busy_timeout=30_000)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sessions(engine):
+    return make_session_factory(engine)
+
+
+@pytest.fixture
+def commits(engine):
+    counted = []
+    event.listen(engine, "commit", lambda connection: counted.append(1))
+    return counted
+
+
+def test_concurrent_bookings_commit_in_batches(sessions, commits, create_user_and_executor):
+    """Ensures concurrent bookings share few commits, each gets its own result and nothing is double booked."""
+    with sessions() as session:
+        user, executor = create_user_and_executor(session, "Alice")
+    results, conflicts = [], []
+    commits.clear()
+
+    def client(offset: int):
+        # Clients book the same slots pairwise, so half of the bookings collide
+        day = date.today() + timedelta(days=offset // 2)
+        for i in range(BOOKINGS):
+            start_time, end_time = time(8 + i // 2, i % 2 * 30), time(8 + i // 2, i % 2 * 30 + 29)
+            try:
+                results.append(bookings.add_event(user, executor, "Math", start_time, end_time, day))
+            except SlotConflictError:
+                conflicts.append(offset)
+
+    with BookingQueue(sessions, max_wait=0.02) as bookings:
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(results) + len(conflicts) == THREADS * BOOKINGS
+    assert len(results) == THREADS // 2 * BOOKINGS
+    assert len(commits) < len(results)
+    with sessions() as session:
+        rows = session.query(Event).order_by(Event.start_at).all()
+        assert sorted(row.id for row in rows) == sorted(results)
+        spans = [(row.start_at, row.end_at) for row in rows]
+        assert merge_intervals(spans) == spans
+
+
+def test_conflicts_with_stored_bookings(sessions, create_user_and_executor):
+    """Ensures a booking colliding with the stored schedule fails alone while the rest of its batch commits."""
+    with sessions() as session:
+        user, executor = create_user_and_executor(session, "Alice")
+    with sessions() as session:
+        EventService(session).reserve_event(user, executor, "Math", time(9), time(10), date.today())
+
+    with BookingQueue(sessions, max_wait=0.05) as bookings:
+        taken = bookings.submit(user, executor, "Art", time(9, 30), time(10, 30), date.today())
+        free = bookings.submit(user, executor, "Art", time(11), time(12), date.today())
+        start = datetime.combine(date.today(), time(13))
+        series = bookings.submit(
+            user, executor, "Weekly", time(13), time(14), date.today(),
+            timedelta(weeks=1), start, start + timedelta(weeks=4),
+        )
+        with pytest.raises(SlotConflictError):
+            taken.result()
+        event_id, series_id = free.result(), series.result()
+
+    with sessions() as session:
+        assert session.get(Event, event_id).event_type == "Art"
+        assert session.get(RecurrentEvent, series_id).interval == timedelta(weeks=1).total_seconds()
+
+
+def test_closed_queue_rejects_bookings(sessions, create_user_and_executor):
+    """Ensures closing a queue books what was submitted and refuses anything later."""
+    with sessions() as session:
+        user, executor = create_user_and_executor(session, "Alice")
+    bookings = BookingQueue(sessions, max_wait=1)
+    pending = bookings.submit(user, executor, "Math", time(9), time(10), date.today())
+    bookings.close()
+    assert pending.result(timeout=0) > 0
+    with pytest.raises(RuntimeError):
+        bookings.submit(user, executor, "Math", time(11), time(12), date.today())
@@ -0,0 +1,66 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from src.availability import free_slots
+from src.bitmap import ScheduleBitmap
+from src.repositories import EventRepo, EventBreakRepo
+
+
+def test_bitmap_slots_match_free_slots():
+    """Ensures the bitmap search gives the same slots as the sweep line for minute-aligned schedules."""
+    rng = random.Random(7)
+    first_day = date(2024, 1, 1)
+    origin = datetime.combine(first_day, time.min)
+    for _ in range(300):
+        events = []
+        for _ in range(rng.randint(0, 30)):
+            event_start = origin + timedelta(minutes=rng.randint(-60, 3 * 24 * 60))
+            events.append((event_start, event_start + timedelta(minutes=rng.randint(1, 240))))
+        bitmap = ScheduleBitmap.from_intervals(events, first_day, 3)
+        start = origin + timedelta(minutes=rng.randint(0, 24 * 60))
+        end = start + timedelta(minutes=rng.randint(0, 24 * 60))
+        slot_size = timedelta(minutes=rng.choice([1, 5, 15, 25, 30, 60, 90]))
+
+        assert bitmap.free_slots(start, end, slot_size) == list(free_slots(start, end, slot_size, events))
+
+
+def test_bitmap_is_compact():
+    """Ensures a bitmap takes one bit per slot."""
+    bitmap = ScheduleBitmap.from_intervals([], date(2024, 1, 1), 7)
+    assert bitmap.nbytes == 7 * 180
+    assert ScheduleBitmap(date(2024, 1, 1), 1, timedelta(minutes=5)).nbytes == 36
+
+
+def test_bitmap_rounds_unaligned_intervals_outward():
+    """Ensures busy intervals off the slot grid mark every slot they touch."""
+    origin = datetime(2024, 1, 1)
+    bitmap = ScheduleBitmap.from_intervals(
+        [(origin + timedelta(minutes=20), origin + timedelta(minutes=40))], origin.date(), 1, timedelta(minutes=15)
+    )
+    assert [bitmap.is_busy(origin + timedelta(minutes=m)) for m in (0, 15, 30, 45)] == [False, True, True, False]
+
+
+def test_bitmap_rejects_unaligned_slots():
+    """Ensures free slot searches off the grid or past the bitmap's days raise ValueError."""
+    bitmap = ScheduleBitmap(date(2024, 1, 1), 1, timedelta(minutes=15))
+    with pytest.raises(ValueError):
+        bitmap.free_slots(datetime(2024, 1, 1, 9, 5), datetime(2024, 1, 1, 12), timedelta(minutes=30))
+    with pytest.raises(ValueError):
+        bitmap.free_slots(datetime(2024, 1, 1, 9), datetime(2024, 1, 2, 12), timedelta(minutes=30))
+
+
+def test_available_slots_bitmap_includes_breaks(event_service, db_session, create_user_and_executor):
+    """Ensures the bitmap slot search treats breaks as busy, like available_slots."""
+    user, executor = create_user_and_executor(db_session, "Alice")
+    day = date.today()
+    EventRepo(db_session).new(user, executor, "Math", time(9), time(10), day)
+    EventBreakRepo(db_session).new(user, "Lunch", datetime.combine(day, time(12)), datetime.combine(day, time(13)))
+    db_session.commit()
+
+    start, end = datetime.combine(day, time(8)), datetime.combine(day, time(14))
+    slots = event_service.available_slots_bitmap(executor, start, end, timedelta(hours=1))
+    assert [s.hour for s, _ in slots] == [8, 10, 11, 13]
+    assert [s.hour for s, _ in event_service.available_slots(executor, start, end, timedelta(hours=1))] == \
+        [8, 10, 11, 12, 13]
@@ -0,0 +1,78 @@
+from datetime import datetime, date, time, timedelta
+
+from src.cache import ScheduleCache
+from src.repositories import EventRepo
+from src.service import EventService
+
+
+def test_lru_eviction_and_counters():
+    """Ensures the cache is bounded, evicts the least recently used day and counts hits and misses."""
+    cache = ScheduleCache(maxsize=2)
+    day = date(2024, 1, 1)
+    cache.put(1, day, [], cache.generation(1))
+    cache.put(2, day, [], cache.generation(2))
+    assert cache.get(1, day) == []
+    cache.put(3, day, [], cache.generation(3))
+
+    assert cache.get(2, day) is None
+    assert cache.get(3, day) == []
+    assert cache.stats() | {"hit_rate": None} == {
+        "size": 2, "maxsize": 2, "hits": 2, "misses": 1, "evictions": 1, "hit_rate": None,
+    }
+
+
+def test_stale_generation_is_not_stored():
+    """Ensures a schedule read before an invalidation isn't cached after it."""
+    cache = ScheduleCache()
+    generation = cache.generation(1)
+    cache.invalidate(1)
+    cache.put(1, date(2024, 1, 1), [], generation)
+    assert len(cache) == 0
+
+
+def test_warm_read_issues_no_query(db_session, sql_statements, create_user_and_executor):
+    """Ensures repeated reads of an executor-day are served from the cache."""
+    user, executor = create_user_and_executor(db_session, "Alice")
+    EventRepo(db_session).new(user, executor, "Math", time(10), time(11), date.today())
+    db_session.commit()
+    service = EventService(db_session, cache=ScheduleCache())
+    start = datetime.combine(date.today(), time(9))
+
+    cold = service.available_slots(executor, start, start + timedelta(hours=3), timedelta(hours=1))
+    sql_statements.clear()
+    warm = service.available_slots(executor, start, start + timedelta(hours=3), timedelta(hours=1))
+
+    assert warm == cold == [(start, start + timedelta(hours=1)), (start + timedelta(hours=2), start + timedelta(hours=3))]
+    assert sql_statements == []
+    assert service.cache.hits == 1
+
+
+def test_writes_invalidate_affected_days(db_session, create_user_and_executor):
+    """Ensures add, move, cancel and the repositories' writes drop exactly the executor-days they change."""
+    user, executor = create_user_and_executor(db_session, "Bob")
+    other_user, other_executor = create_user_and_executor(db_session, "Carol")
+    cache = ScheduleCache()
+    service = EventService(db_session, cache=cache)
+    today, tomorrow = date.today(), date.today() + timedelta(days=1)
+    for day in (today, tomorrow):
+        service.busy_for_day(day, executor)
+    service.busy_for_day(today, other_executor)
+
+    event = service.add_event(user, executor, "Math", time(10), time(11), today)
+    db_session.commit()
+    assert cache.get(executor.id, today) is None
+    assert cache.get(executor.id, tomorrow) is not None
+    assert cache.get(other_executor.id, today) is not None
+
+    assert service.busy_for_day(today, executor) == [(datetime.combine(today, time(10)), datetime.combine(today, time(11)))]
+    service.move_event(event, new_st=time(12), new_et=time(13))
+    assert service.busy_for_day(today, executor) == [(datetime.combine(today, time(12)), datetime.combine(today, time(13)))]
+    service.cancel_event(event)
+    assert service.busy_for_day(today, executor) == []
+
+    service.busy_for_day(today, other_executor)
+    other_event = EventRepo(db_session).new(other_user, other_executor, "Art", time(9), time(10), today)
+    db_session.commit()
+    assert len(service.busy_for_day(today, other_executor)) == 1
+    EventRepo(db_session).delete(other_event.id)
+    assert cache.get(other_executor.id, today) is None
@@ -0,0 +1,105 @@
+import pytest
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import text, update, event
+from sqlalchemy.exc import OperationalError
+
+from src import database
+from src.database import make_engine, make_session_factory, unit_of_work, init_db, schema_marker, SCHEMA_VERSION
+from src.models import Base, Executor, User
+
+
+def pragma(engine, name):
+    with engine.connect() as connection:
+        return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_make_engine_sets_pragmas(tmp_path):
+    """Ensures SQLite connections are opened in WAL mode with the requested tuning."""
+    engine = make_engine(f"sqlite:///{tmp_path / 'db.sqlite'}", cache_size=-2_000, busy_timeout=1_234)
+
+    assert pragma(engine, "journal_mode") == "wal"
+    assert pragma(engine, "synchronous") == 1  # NORMAL
+    assert pragma(engine, "cache_size") == -2_000
+    assert pragma(engine, "busy_timeout") == 1_234
+
+
+def test_read_only_engine(tmp_path):
+    """Ensures a read-only engine can read but not write."""
+    url = f"sqlite:///{tmp_path / 'db.sqlite'}"
+    Base.metadata.create_all(make_engine(url))
+    reader = make_engine(url, read_only=True)
+
+    with reader.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM users")).scalar() == 0
+        with pytest.raises(OperationalError):
+            connection.execute(text("INSERT INTO users (name, role) VALUES ('x', 'user')"))
+
+
+def test_unit_of_work(tmp_path):
+    """Ensures a unit of work commits on success and rolls back on error."""
+    engine = make_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    Base.metadata.create_all(engine)
+    sessions = make_session_factory(engine)
+
+    with unit_of_work(sessions) as session:
+        executor = Executor()
+        session.add(executor)
+        session.flush()
+        session.add(User(name="Alice", role="teacher", executor_id=executor.id))
+
+    with pytest.raises(RuntimeError):
+        with unit_of_work(sessions) as session:
+            session.add(User(name="Bob", role="teacher"))
+            raise RuntimeError
+
+    with unit_of_work(sessions) as session:
+        assert [u.name for u in session.query(User)] == ["Alice"]
+
+
+def test_import_does_not_touch_the_database(tmp_path):
+    """Ensures importing the database module creates no engine and no file until one is asked for."""
+    path = tmp_path / "db.sqlite"
+    code = (
+        "import os\n"
+        "from src import database\n"
+        f"assert database._engine is None and not os.path.exists({str(path)!r})\n"
+        "assert database.engine is database.get_engine()\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent, check=True,
+        env={**os.environ, "BOOKING_DB_URL": f"sqlite:///{path}"},
+    )
+
+
+def test_init_db_is_skipped_on_warm_starts(tmp_path):
+    """Ensures the schema is set up once and later starts only read the version marker."""
+    url = f"sqlite:///{tmp_path / 'db.sqlite'}"
+    assert init_db(make_engine(url)) is True
+
+    # A new engine stands for a new process
+    engine = make_engine(url)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert init_db(engine) is False
+    assert not any("CREATE" in statement for statement in statements)
+    assert init_db(engine) is False
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM users")).scalar() == 0
+        assert connection.execute(schema_marker.select()).all() == [(SCHEMA_VERSION,)]
+
+
+def test_init_db_runs_again_for_an_older_schema(tmp_path):
+    """Ensures init_db upgrades a database marked with an older schema version."""
+    url = f"sqlite:///{tmp_path / 'db.sqlite'}"
+    init_db(make_engine(url))
+    with make_engine(url).begin() as connection:
+        connection.execute(update(schema_marker).values(version=SCHEMA_VERSION - 1))
+
+    engine = make_engine(url)
+    assert init_db(engine) is True
+    with engine.connect() as connection:
+        assert database.schema_version(connection) == SCHEMA_VERSION
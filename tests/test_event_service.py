@@ -2,7 +2,8 @@ from datetime import datetime, date, time, timedelta
 
 import pytest
 
-from src.models import User, Executor
+from src.models import User, Executor, Event
+from src.repositories import EventRepo, RecurrentEventRepo, EventBreakRepo
 from src.service import EventService
 
 
@@ -41,6 +42,29 @@ def test_prevent_event_collision(event_service, db_session):
         event_service.add_event(user1, executor1, "Science", time(9, 30), time(10, 30), date.today())
 
 
+def test_events_built_directly_keep_their_span(event_service, db_session, create_user_and_executor):
+    """Ensures events created or edited without the repository are seen by period reads and conflict checks."""
+    user, executor = create_user_and_executor(db_session, "Alice")
+    event = Event(
+        user_id=user.id, executor_id=executor.id, event_type="Math",
+        start_time=time(9), end_time=time(10), date=date.today(), weekday=date.today().weekday(),
+    )
+    db_session.add(event)
+    db_session.commit()
+
+    start = datetime.combine(date.today(), time(8))
+    assert event_service.events_for_period(start, start + timedelta(hours=4), executor) == [event]
+    with pytest.raises(ValueError):
+        event_service.add_event(user, executor, "Art", time(9, 30), time(10, 30), date.today())
+
+    event.start_time, event.end_time = time(13), time(14)
+    db_session.commit()
+    assert event.start_at == datetime.combine(date.today(), time(13))
+    slots = event_service.available_slots(executor, start, start + timedelta(hours=8), timedelta(hours=1))
+    assert (datetime.combine(date.today(), time(13)), datetime.combine(date.today(), time(14))) not in slots
+    event_service.add_event(user, executor, "Art", time(9, 30), time(10, 30), date.today())
+
+
 def test_create_recurrent_event(event_service, db_session):
     """Ensures a recurrent event can be created."""
     user1, executor1 = create_user_and_executor(db_session, "Charlie")
@@ -125,3 +149,124 @@ def test_get_available_slots(event_service, db_session):
     assert (time(9, 0), time(9, 30)) in available_slots
     assert (time(9, 30), time(10, 0)) in available_slots
     assert (time(11, 0), time(11, 30)) in available_slots
+
+
+def test_available_slots_with_recurrent_event(event_service, db_session, create_user_and_executor):
+    """Ensures occurrences of recurrent events are excluded from available slots."""
+    user1, executor1 = create_user_and_executor(db_session, "Ivan")
+    today = date.today()
+
+    event_service.add_event(
+        user1, executor1, "Weekly Piano", time(10, 0), time(11, 0), today,
+        interval=timedelta(days=7), start=datetime.combine(today, time(10, 0)),
+    )
+    db_session.commit()
+
+    next_week = today + timedelta(days=7)
+    available_slots = event_service.available_slots(executor1, datetime.combine(next_week, time(9, 0)),
+                                                    datetime.combine(next_week, time(12, 0)), timedelta(hours=1))
+
+    available_slots = [(s.time(), e.time()) for s, e in available_slots]
+    assert available_slots == [(time(9, 0), time(10, 0)), (time(11, 0), time(12, 0))]
+
+
+def test_available_slots_many(event_service, db_session, sql_statements, create_user_and_executor):
+    """Ensures bulk availability matches per-executor results with a constant number of queries."""
+    executors = []
+    for i in range(5):
+        user, executor = create_user_and_executor(db_session, f"Teacher {i}")
+        EventRepo(db_session).new(user, executor, "Math", time(9 + i, 0), time(10 + i, 0), date.today())
+        RecurrentEventRepo(db_session).new(
+            user, executor, "Weekly Math", time(15, 0), time(16, 0), date.today() + timedelta(days=1),
+            timedelta(days=1), datetime.combine(date.today(), time(15, 0)),
+        )
+        executors.append(executor)
+    db_session.commit()
+
+    start = datetime.combine(date.today(), time(8, 0))
+    end = start + timedelta(days=2)
+    sql_statements.clear()
+    slots = event_service.available_slots_many(executors, start, end, timedelta(minutes=30))
+
+    assert len(sql_statements) == 2
+    assert slots == {e.id: event_service.available_slots(e, start, end, timedelta(minutes=30)) for e in executors}
+
+
+def test_add_events_bulk(event_service, db_session, create_user_and_executor):
+    """Ensures a batch is checked against the schedule and itself, and only valid items are inserted."""
+    user1, executor1 = create_user_and_executor(db_session, "Jane")
+    user2, executor2 = create_user_and_executor(db_session, "Kyle")
+    today = date.today()
+    event_service.add_event(user1, executor1, "Math", time(9, 0), time(10, 0), today)
+    db_session.commit()
+
+    def item(user, executor, start_time, end_time, **kwargs):
+        return {"user": user, "executor": executor, "event_type": "Lesson",
+                "start_time": start_time, "end_time": end_time, "day": today, **kwargs}
+
+    result = event_service.add_events_bulk([
+        item(user1, executor1, time(9, 30), time(10, 30)),  # collides with the stored event
+        item(user1, executor1, time(11, 0), time(12, 0)),  # collides with the earlier item below
+        item(user1, executor1, time(10, 30), time(11, 30)),
+        item(user2, executor2, time(9, 30), time(10, 30)),  # another executor is free
+        item(user2, executor2, time(13, 0), time(14, 0), interval=timedelta(days=7),
+             start=datetime.combine(today, time(13, 0))),
+    ])
+    db_session.commit()
+
+    assert set(result.conflicts) == {0, 1}
+    assert set(result.created) == {2, 3, 4}
+    assert {e.start_time for e in event_service.events_for_day(today, executor1)} == {time(9, 0), time(10, 30)}
+    assert len(event_service.events_for_day(today, executor2)) == 2  # the event and the series' template
+    with pytest.raises(ValueError):
+        event_service.add_event(user2, executor2, "Math", time(13, 0), time(14, 0), today + timedelta(days=7))
+
+
+def test_common_free_slots(event_service, db_session, create_user_and_executor):
+    """Ensures the common windows exclude the executors' schedules, the users' bookings and their breaks."""
+    teacher1, executor1 = create_user_and_executor(db_session, "Jane")
+    teacher2, executor2 = create_user_and_executor(db_session, "Kyle")
+    student = User(name="Sam", role="student")
+    db_session.add(student)
+    db_session.commit()
+    day = date.today() + timedelta(days=1)
+    at = lambda hour, minute=0: datetime.combine(day, time(hour, minute))
+
+    EventRepo(db_session).new(teacher1, executor1, "Math", time(9, 0), time(10, 0), day)
+    EventRepo(db_session).new(student, executor2, "Art", time(11, 0), time(11, 30), day)
+    RecurrentEventRepo(db_session).new(
+        student, executor1, "Weekly", time(15, 0), time(16, 0), day, timedelta(days=7), at(15), None,
+    )
+    EventBreakRepo(db_session).new(student, "Lunch", at(12, 30), at(13, 30))
+    db_session.commit()
+
+    slots = event_service.common_free_slots([executor1, executor2, student], at(8), at(18), timedelta(minutes=45))
+    assert slots == [(at(8), at(9)), (at(10), at(11)), (at(11, 30), at(12, 30)), (at(13, 30), at(15)), (at(16), at(18))]
+    # The student's bookings count without their executors
+    assert event_service.common_free_slots([student], at(10), at(18), timedelta(minutes=45)) == \
+        [(at(10), at(11)), (at(11, 30), at(12, 30)), (at(13, 30), at(15)), (at(16), at(18))]
+    assert event_service.common_free_slots([executor2], at(8), at(18), timedelta(hours=3)) == \
+        [(at(8), at(11)), (at(11, 30), at(18))]
+
+
+def test_available_slots_parallel_matches_serial(event_service, db_session, create_user_and_executor):
+    """Ensures the process pool gives the same slots as available_slots_many, split by executor or by date."""
+    executors = []
+    for i in range(5):
+        user, executor = create_user_and_executor(db_session, f"Teacher {i}")
+        for d in range(3):
+            day = date.today() + timedelta(days=d)
+            EventRepo(db_session).new(user, executor, "Math", time(9 + i), time(10 + i, 10 * i), day)
+        RecurrentEventRepo(db_session).new(
+            user, executor, "Weekly", time(15), time(16), date.today(), timedelta(days=2),
+            datetime.combine(date.today(), time(15)), None,
+        )
+        executors.append(executor)
+    db_session.commit()
+
+    start = datetime.combine(date.today(), time(8, 0))
+    end = start + timedelta(days=4, minutes=7)
+    expected = event_service.available_slots_many(executors, start, end, timedelta(minutes=25))
+    assert event_service.available_slots_parallel(executors, start, end, timedelta(minutes=25), workers=2) == expected
+    assert event_service.available_slots_parallel(executors[:1], start, end, timedelta(minutes=25), workers=1) == \
+        {executors[0].id: expected[executors[0].id]}
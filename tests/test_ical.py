@@ -0,0 +1,130 @@
+import io
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from src.ical import export_calendar, import_calendar, parse_events, fold, unfolded_lines, escape, unescape
+from src.models import Event, RecurrentEvent
+from src.repositories import EventRepo, RecurrentEventRepo, EventBreakRepo
+
+
+@pytest.fixture
+def calendar(db_session, create_user_and_executor):
+    user, executor = create_user_and_executor(db_session, "Alice")
+    day = date(2024, 3, 4)
+    EventRepo(db_session).new(user, executor, "Math; algebra, part 1", time(9), time(10), day)
+    cancelled = EventRepo(db_session).new(user, executor, "Cancelled", time(11), time(12), day)
+    cancelled.cancelled = True
+    start = datetime.combine(day, time(14))
+    RecurrentEventRepo(db_session).new(
+        user, executor, "Weekly", time(14), time(15, 30), day, timedelta(weeks=2), start, start + timedelta(weeks=8),
+    )
+    EventBreakRepo(db_session).new(user, "Holiday", datetime(2024, 3, 10), datetime(2024, 3, 17))
+    db_session.commit()
+    return user, executor
+
+
+def test_export_writes_series_as_rrules(db_session, calendar):
+    """Ensures the export escapes text, writes series as RRULEs and folds long lines."""
+    user, executor = calendar
+    out = io.StringIO()
+    assert export_calendar(db_session, out, executor=executor) == 3
+
+    events = {c["UID"][1]: c for c in parse_events(io.StringIO(out.getvalue()))}
+    assert {uid.split("-")[0] for uid in events} == {"event", "series", "break"}
+    one_off = next(c for uid, c in events.items() if uid.startswith("event"))
+    assert unescape(one_off["SUMMARY"][1]) == "Math; algebra, part 1"
+    assert one_off["DTSTART"][1] == "20240304T090000"
+    series = next(c for uid, c in events.items() if uid.startswith("series"))
+    assert series["RRULE"][1] == "FREQ=WEEKLY;INTERVAL=2;UNTIL=20240429T140000"
+    assert series["DTEND"][1] == "20240304T153000"
+    assert all(len(line.encode()) <= 77 for line in out.getvalue().splitlines(keepends=True))
+
+
+def test_export_and_import_round_trip(db_session, event_service, calendar, create_user_and_executor):
+    """Ensures an exported calendar imports back into the same bookings and collides when imported twice."""
+    user, executor = calendar
+    out = io.StringIO()
+    export_calendar(db_session, out, user=user)
+    other_user, other_executor = create_user_and_executor(db_session, "Bob")
+
+    result = import_calendar(event_service, io.StringIO(out.getvalue()), other_user, other_executor, batch_size=1)
+
+    assert result.created == 2
+    assert result.conflicts == {}
+    assert list(result.skipped.values()) == ["breaks are not imported"]
+    series = db_session.query(RecurrentEvent).filter_by(executor_id=other_executor.id).one()
+    assert (series.interval, series.start, series.end) == (14 * 24 * 3600, datetime(2024, 3, 4, 14), datetime(2024, 4, 29, 14))
+    assert series.event.end_time == time(15, 30)
+    assert db_session.query(Event).filter_by(executor_id=other_executor.id, event_type="Math; algebra, part 1").count() == 1
+
+    # Importing the same file again collides with what the first import booked
+    again = import_calendar(event_service, io.StringIO(out.getvalue()), other_user, other_executor)
+    assert again.created == 0 and len(again.conflicts) == 2
+
+
+def test_import_skips_unbookable_events(event_service, db_session, create_user_and_executor):
+    """Ensures events the schedule cannot hold are skipped with a reason instead of failing the import."""
+    user, executor = create_user_and_executor(db_session, "Alice")
+    ics = "\r\n".join([
+        "BEGIN:VCALENDAR",
+        "BEGIN:VEVENT", "UID:all-day", "DTSTART;VALUE=DATE:20240304", "DTEND;VALUE=DATE:20240305", "END:VEVENT",
+        "BEGIN:VEVENT", "UID:overnight", "DTSTART:20240304T230000", "DTEND:20240305T010000", "END:VEVENT",
+        "BEGIN:VEVENT", "UID:byday", "DTSTART:20240304T090000", "DURATION:PT1H", "RRULE:FREQ=WEEKLY;BYDAY=MO,WE",
+        "END:VEVENT",
+        "BEGIN:VEVENT", "UID:ok", "DTSTART:20240304T090000", "DURATION:PT45M", "RRULE:FREQ=DAILY;COUNT=3",
+        "BEGIN:VALARM", "TRIGGER:-PT15M", "END:VALARM", "SUMMARY:Daily", "END:VEVENT",
+        "END:VCALENDAR", "",
+    ])
+    result = import_calendar(event_service, io.StringIO(ics), user, executor)
+
+    assert result.created == 1
+    assert set(result.skipped) == {"all-day", "overnight", "byday"}
+    series = db_session.query(RecurrentEvent).one()
+    assert (series.event.event_type, series.end) == ("Daily", datetime(2024, 3, 6, 9))
+
+
+def test_import_converts_utc_times(event_service, db_session, create_user_and_executor):
+    """Ensures UTC times are booked at the wall clock time of the import's time zone."""
+    user, executor = create_user_and_executor(db_session, "Alice")
+    ics = "\r\n".join([
+        "BEGIN:VCALENDAR",
+        "BEGIN:VEVENT", "UID:utc", "DTSTART:20240115T090000Z", "DTEND:20240115T100000Z", "END:VEVENT",
+        "BEGIN:VEVENT", "UID:series", "DTSTART:20240116T090000Z", "DURATION:PT1H",
+        "RRULE:FREQ=WEEKLY;UNTIL=20240213T090000Z", "END:VEVENT",
+        "END:VCALENDAR", "",
+    ])
+    result = import_calendar(event_service, io.StringIO(ics), user, executor, zone=ZoneInfo("Europe/Berlin"))
+
+    assert result.created == 2 and result.skipped == {}
+    event = db_session.query(Event).filter_by(date=date(2024, 1, 15)).one()
+    assert (event.start_time, event.end_time) == (time(10), time(11))
+    series = db_session.query(RecurrentEvent).one()
+    assert (series.start, series.end) == (datetime(2024, 1, 16, 10), datetime(2024, 2, 13, 10))
+
+
+def test_import_converts_tzid_times(event_service, db_session, create_user_and_executor):
+    """Ensures TZID times are converted to the import's time zone and unknown zones are skipped."""
+    user, executor = create_user_and_executor(db_session, "Alice")
+    ics = "\r\n".join([
+        "BEGIN:VCALENDAR",
+        "BEGIN:VEVENT", "UID:new-york", "DTSTART;TZID=America/New_York:20240115T090000",
+        "DTEND;TZID=America/New_York:20240115T100000", "END:VEVENT",
+        "BEGIN:VEVENT", "UID:nowhere", "DTSTART;TZID=Nowhere/City:20240115T090000", "DURATION:PT1H", "END:VEVENT",
+        "END:VCALENDAR", "",
+    ])
+    result = import_calendar(event_service, io.StringIO(ics), user, executor, zone=ZoneInfo("Europe/Berlin"))
+
+    assert result.created == 1
+    assert set(result.skipped) == {"nowhere"}
+    event = db_session.query(Event).one()
+    assert (event.date, event.start_time, event.end_time) == (date(2024, 1, 15), time(15), time(16))
+
+
+def test_folding_round_trip():
+    """Ensures folded lines stay within 75 octets and unfold back to the original line."""
+    line = "SUMMARY:" + escape("Très long résumé, " * 10)
+    folded = fold(line)
+    assert all(len(part.encode()) <= 75 for part in folded.split("\r\n"))
+    assert list(unfolded_lines(io.StringIO(folded))) == [line]
@@ -0,0 +1,79 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from src.instrumentation import metrics, Histogram
+from src.repositories import EventRepo
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+@pytest.fixture
+def schedule(db_session, create_user_and_executor):
+    user, executor = create_user_and_executor(db_session, "Alice")
+    for hour in (9, 10, 11):
+        EventRepo(db_session).new(user, executor, "Lesson", time(hour), time(hour, 45), date.today())
+    db_session.commit()
+    return user, executor
+
+
+def test_histogram_buckets_are_cumulative():
+    """Ensures every histogram bucket counts the observations at or below its bound."""
+    histogram = Histogram((1, 10))
+    for value in (0, 1, 5, 50):
+        histogram.observe(value)
+    assert histogram.cumulative() == [("1", 2), ("10", 3), ("+Inf", 4)]
+    assert histogram.sum == 56
+
+
+def test_records_statements_and_rows(event_service, schedule, enabled_metrics):
+    """Ensures each call records its duration, SQL statements and fetched rows."""
+    user, executor = schedule
+    rows = event_service.events_for_day(date.today(), executor)
+    event_service.events_for_day(date.today(), executor)
+
+    stats = enabled_metrics.to_dict()["EventService.events_for_day"]
+    assert stats["duration_seconds"]["count"] == 2
+    assert stats["sql_statements"]["sum"] == 4
+    assert stats["rows_fetched"]["sum"] == 2 * len(rows) == 6
+
+
+def test_nested_calls_count_towards_the_caller(event_service, schedule, db_session, enabled_metrics):
+    """Ensures statements run by a nested instrumented call also count towards its caller."""
+    user, executor = schedule
+    event_service.add_event(user, executor, "Art", time(18), time(19), date.today())
+    db_session.flush()
+
+    stats = enabled_metrics.to_dict()
+    assert stats["EventRepo.new"]["duration_seconds"]["count"] == 1
+    # The conflict check reads the one-off and recurrent tables; the insert happens later, on flush
+    assert stats["EventService.add_event"]["sql_statements"]["sum"] == 2
+    # Only events overlapping the new slot are read, and there are none
+    assert stats["EventService.add_event"]["rows_fetched"]["sum"] == 0
+
+
+def test_prometheus_text(event_service, schedule, enabled_metrics):
+    """Ensures the metrics render in the Prometheus text format."""
+    user, executor = schedule
+    start = datetime.combine(date.today(), time(8))
+    event_service.available_slots(executor, start, start + timedelta(hours=8), timedelta(minutes=30))
+
+    text = enabled_metrics.to_prometheus()
+    assert "# TYPE booking_method_duration_seconds histogram" in text
+    assert 'booking_method_sql_statements_count{method="EventService.available_slots"} 1' in text
+    assert 'booking_method_rows_fetched_bucket{method="EventService.available_slots",le="+Inf"} 1' in text
+
+
+def test_disabled_records_nothing(event_service, schedule):
+    """Ensures nothing is recorded while metrics are disabled."""
+    user, executor = schedule
+    metrics.reset()
+    event_service.events_for_day(date.today(), executor)
+    assert metrics.to_dict() == {}
@@ -0,0 +1,79 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import inspect, insert, text
+from sqlalchemy.orm import Session
+
+from src.database import make_engine, init_db, schema_marker
+from src.migrations import backfill_event_span
+from src.models import Event, Executor
+from src.service import EventService
+
+LEGACY_EVENTS = """
+CREATE TABLE events (
+    id INTEGER PRIMARY KEY, user_id INTEGER, executor_id INTEGER NOT NULL, event_type VARCHAR,
+    start_time TIME, end_time TIME, date DATE, weekday INTEGER, cancelled BOOLEAN,
+    reschedule_id INTEGER, is_rescheduled BOOLEAN
+)
+"""
+LEGACY_RECURRENT_EVENTS = """
+CREATE TABLE recurrent_events (
+    id INTEGER PRIMARY KEY, user_id INTEGER, executor_id INTEGER NOT NULL, event_id INTEGER,
+    interval INTEGER, start DATETIME, "end" DATETIME
+)
+"""
+
+
+def test_migration_adds_and_backfills_event_span(tmp_path):
+    """Ensures a version 1 database gets its new columns, start_at/end_at filled and indexed, and serves reads."""
+    url = f"sqlite:///{tmp_path / 'db.sqlite'}"
+    with make_engine(url).begin() as connection:
+        connection.execute(text(LEGACY_EVENTS))
+        connection.execute(text(LEGACY_RECURRENT_EVENTS))
+        connection.execute(text("CREATE INDEX ix_events_user_date ON events (user_id, date, cancelled)"))
+        connection.execute(text("CREATE TABLE executors (id INTEGER PRIMARY KEY)"))
+        connection.execute(text("INSERT INTO executors (id) VALUES (1)"))
+        connection.execute(text(
+            "INSERT INTO recurrent_events (executor_id, event_id, interval, start, \"end\") "
+            "VALUES (1, 1, 604800, '2024-03-01 08:00:00.000000', '2024-04-01 08:00:00.000000')"
+        ))
+        for i in range(25):
+            connection.execute(text(
+                "INSERT INTO events (executor_id, event_type, start_time, end_time, date, cancelled) "
+                "VALUES (1, 'lesson', :st, :et, :d, 0)"
+            ), {"st": f"{8 + i % 10:02}:00:00.000000", "et": f"{8 + i % 10:02}:45:00.000000",
+                "d": str(date(2024, 3, 1) + timedelta(days=i))})
+        schema_marker.create(connection)
+        connection.execute(insert(schema_marker).values(version=1))
+
+    engine = make_engine(url)
+    assert init_db(engine) is True
+
+    inspector = inspect(engine)
+    assert {"start_at", "end_at"} <= {c["name"] for c in inspector.get_columns("events")}
+    assert "materialized_until" in {c["name"] for c in inspector.get_columns("recurrent_events")}
+    indexes = {i["name"] for i in inspector.get_indexes("events")}
+    assert "ix_events_executor_start_at" in indexes
+    assert "ix_events_user_date" not in indexes
+    with Session(engine) as db:
+        event = db.get(Event, 3)
+        assert (event.start_at, event.end_at) == (datetime(2024, 3, 3, 10), datetime(2024, 3, 3, 10, 45))
+        start = datetime(2024, 3, 5, 10, 30)
+        found = EventService(db).events_for_period(start, start + timedelta(days=2), db.get(Executor, 1))
+        assert [e.id for e in found] == [5, 6]
+        day = EventService(db).events_for_day(date(2024, 3, 8), db.get(Executor, 1))
+        assert [type(e).__name__ for e in day] == ["Event", "RecurrentEvent"]
+        assert backfill_event_span(db.connection()) == 0
+
+
+def test_backfill_works_in_chunks(db_session):
+    """Ensures the span backfill fills every event when it runs in several chunks."""
+    executor = Executor()
+    db_session.add(executor)
+    db_session.flush()
+    db_session.execute(insert(Event), [
+        {"executor_id": executor.id, "date": date(2024, 1, 1) + timedelta(days=i), "start_time": time(9),
+         "end_time": time(10)}
+        for i in range(7)
+    ])
+    assert backfill_event_span(db_session.connection(), chunk=3) == 7
+    assert db_session.query(Event).filter(Event.start_at == None).count() == 0
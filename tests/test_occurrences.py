@@ -0,0 +1,133 @@
+from datetime import datetime, date, time, timedelta
+
+import pytest
+
+from src.models import EventOccurrence, RecurrentEvent
+from src.recurrence import HORIZON
+from src.repositories import EventOccurrenceRepo, EventRepo
+from src.service import EventService
+
+
+@pytest.fixture
+def materialized(db_session):
+    """An EventService reading and writing the event_occurrences table."""
+    return EventService(db_session, materialized=True)
+
+
+def add_weekly(event_service, user, executor, end=None):
+    today = date.today()
+    series = event_service.add_event(
+        user, executor, "Weekly Piano", time(10, 0), time(11, 0), today,
+        interval=timedelta(days=7), start=datetime.combine(today, time(10, 0)), end=end,
+    )
+    event_service.db.commit()
+    return series
+
+
+def stored_starts(db_session, series):
+    return [o.start for o in db_session.query(EventOccurrence).filter_by(recurrent_event_id=series.id)
+            .order_by(EventOccurrence.start)]
+
+
+def test_new_series_is_materialized(materialized, db_session, create_user_and_executor):
+    """Ensures a new recurrent event stores its occurrences for the rolling horizon."""
+    user, executor = create_user_and_executor(db_session, "Alice")
+    series = add_weekly(materialized, user, executor)
+
+    starts = stored_starts(db_session, series)
+    first = datetime.combine(date.today(), time(10, 0))
+    assert starts == [first + timedelta(weeks=w) for w in range(len(starts))]
+    assert starts[-1] < first + HORIZON <= starts[-1] + timedelta(weeks=1)
+    assert series.materialized_until is not None
+
+
+def test_series_outside_materialized_mode_wait_for_roll_forward(event_service, db_session, create_user_and_executor):
+    """Ensures a series booked without materialized mode stores nothing until roll_forward expands it."""
+    user, executor = create_user_and_executor(db_session, "Abe")
+    series = add_weekly(event_service, user, executor)
+    event_service.move_event(series, new_st=time(12, 0), new_et=time(13, 0))
+    db_session.commit()
+    assert stored_starts(db_session, series) == []
+    assert series.materialized_until is None
+
+    EventOccurrenceRepo(db_session).roll_forward()
+    db_session.commit()
+    assert stored_starts(db_session, series)[0] == datetime.combine(date.today(), time(10, 0))
+
+
+def test_move_and_cancel_update_occurrences(materialized, db_session, create_user_and_executor):
+    """Ensures moving a series rewrites its occurrences and cancelling removes them."""
+    user, executor = create_user_and_executor(db_session, "Bob")
+    series = add_weekly(materialized, user, executor)
+
+    materialized.move_event(series, new_st=time(12, 0), new_et=time(13, 0), new_interval=timedelta(days=14))
+    db_session.commit()
+    starts = stored_starts(db_session, series)
+    first = datetime.combine(date.today(), time(10, 0))
+    assert starts[:2] == [first, first + timedelta(weeks=2)]
+    assert all(o.end - o.start == timedelta(hours=1) for o in series.occurrences)
+
+    materialized.cancel_event(series.event)
+    db_session.commit()
+    assert stored_starts(db_session, series) == []
+
+
+def test_roll_forward_extends_horizon(materialized, db_session, create_user_and_executor):
+    """Ensures the maintenance routine appends occurrences without duplicating stored ones and drops expired ones."""
+    user, executor = create_user_and_executor(db_session, "Carol")
+    series = add_weekly(materialized, user, executor)
+    before = stored_starts(db_session, series)
+
+    inserted = EventOccurrenceRepo(db_session).roll_forward(date.today() + timedelta(weeks=4))
+    db_session.commit()
+    after = stored_starts(db_session, series)
+
+    assert inserted == 4
+    # The four occurrences before the new horizon start are gone
+    assert after == before[4:] + [before[-1] + timedelta(weeks=w) for w in range(1, 5)]
+
+
+def test_materialized_reads_match_expansion(materialized, event_service, db_session, create_user_and_executor):
+    """Ensures the materialized read path gives the same slots and series as on-the-fly expansion."""
+    user, executor = create_user_and_executor(db_session, "Dan")
+    today, yesterday = date.today(), date.today() - timedelta(days=1)
+    series = add_weekly(materialized, user, executor, end=datetime.combine(today, time(10)) + timedelta(weeks=3))
+    open_ended = materialized.add_event(
+        user, executor, "Weekly Art", time(12, 0), time(13, 0), today,
+        interval=timedelta(days=7), start=datetime.combine(today, time(12, 0)),
+    )
+    # Started before the window, its last occurrence runs into the window's first half hour
+    earlier = materialized.add_event(
+        user, executor, "Daily Run", time(7, 30), time(8, 30), yesterday,
+        interval=timedelta(days=1), start=datetime.combine(yesterday, time(7, 30)),
+        end=datetime.combine(today, time(7, 30)),
+    )
+    # Ended before the window
+    materialized.add_event(
+        user, executor, "Daily Swim", time(16, 0), time(17, 0), today - timedelta(weeks=2),
+        interval=timedelta(days=1), start=datetime.combine(today - timedelta(weeks=2), time(16, 0)),
+        end=datetime.combine(yesterday, time(6, 0)),
+    )
+    db_session.commit()
+
+    start = datetime.combine(today, time(8, 0))
+    end = start + timedelta(weeks=5)
+    assert materialized.available_slots(executor, start, end, timedelta(hours=1)) == \
+        event_service.available_slots(executor, start, end, timedelta(hours=1))
+    for service in (materialized, event_service):
+        found = [e for e in service.events_for_period(start, end, executor) if isinstance(e, RecurrentEvent)]
+        assert sorted(e.id for e in found) == sorted([series.id, open_ended.id, earlier.id])
+
+
+def test_deleting_a_template_frees_its_occurrences(materialized, db_session, create_user_and_executor):
+    """Ensures deleting a series template deletes the series, so its stored occurrences stop being busy."""
+    user, executor = create_user_and_executor(db_session, "Erin")
+    series = add_weekly(materialized, user, executor)
+    start = datetime.combine(date.today(), time(8, 0))
+    free = materialized.available_slots(executor, start, start + timedelta(hours=4), timedelta(hours=1))
+
+    EventRepo(db_session).delete(series.event_id)
+    db_session.commit()
+    assert db_session.query(EventOccurrence).count() == 0
+    assert len(materialized.available_slots(executor, start, start + timedelta(hours=4), timedelta(hours=1))) \
+        == len(free) + 1
@@ -0,0 +1,173 @@
+from datetime import datetime, date, time, timedelta
+
+import pytest
+
+from src.models import User, Executor, Event, RecurrentEvent
+from src.repositories import EventRepo, RecurrentEventRepo
+
+
+@pytest.fixture
+def schedule(db_session, create_user_and_executor):
+    """An executor with several one-off events today and weekly series that occur today."""
+    user, executor = create_user_and_executor(db_session, "Alice")
+
+    today = date.today()
+    for hour in (8, 9, 10, 11, 12):
+        EventRepo(db_session).new(user, executor, "Lesson", time(hour), time(hour, 45), today)
+    for hour in (14, 15, 16):
+        first = today - timedelta(weeks=1)
+        RecurrentEventRepo(db_session).new(
+            user, executor, "Weekly", time(hour), time(hour, 45), first, timedelta(weeks=1),
+            datetime.combine(first, time(hour)), datetime.combine(first, time(hour)) + timedelta(weeks=8),
+        )
+    db_session.commit()
+    user_id, executor_id = user.id, executor.id
+    # Start from an empty identity map, as a new request would
+    db_session.expunge_all()
+    return db_session.get(User, user_id), db_session.get(Executor, executor_id)
+
+
+def touch(rows):
+    """Reads what a caller typically reads from each row, including the template of recurrent rows."""
+    for row in rows:
+        if isinstance(row, RecurrentEvent):
+            assert row.event.start_time is not None
+        else:
+            assert isinstance(row, Event) and row.start_time is not None
+
+
+def test_events_for_day_query_count(event_service, schedule, assert_queries):
+    """Ensures a day read takes one query per table plus one batch load of the series templates."""
+    user, executor = schedule
+    with assert_queries(3):
+        rows = event_service.events_for_day(date.today(), executor)
+        touch(rows)
+    assert len(rows) == 5 + 3
+
+
+def test_events_for_period_query_count(event_service, schedule, assert_queries):
+    """Ensures a period read takes a fixed number of queries whatever the row count."""
+    user, executor = schedule
+    start = datetime.combine(date.today() - timedelta(weeks=1), time.min)
+    with assert_queries(3):
+        rows = event_service.events_for_period(start, start + timedelta(weeks=10), executor, user)
+        touch(rows)
+    assert len([row for row in rows if isinstance(row, RecurrentEvent)]) == 3
+
+
+def test_available_slots_query_count(event_service, schedule, assert_queries):
+    """Ensures the slot search for one executor takes two queries."""
+    user, executor = schedule
+    start = datetime.combine(date.today(), time(8))
+    with assert_queries(2):
+        event_service.available_slots(executor, start, start + timedelta(hours=10), timedelta(minutes=30))
+
+
+def test_available_slots_many_query_count(event_service, schedule, db_session, assert_queries):
+    """Ensures the slot search for many executors takes as many queries as for one."""
+    user, executor = schedule
+    others = [Executor() for _ in range(10)]
+    db_session.add_all(others)
+    db_session.commit()
+    start = datetime.combine(date.today(), time(8))
+    with assert_queries(2):
+        event_service.available_slots_many([executor, *others], start, start + timedelta(days=7), timedelta(hours=1))
+
+
+def test_add_event_query_count(event_service, schedule, db_session, assert_queries):
+    """Ensures the conflict check reads two tables and the insert happens on flush."""
+    user, executor = schedule
+    with assert_queries(3):
+        event_service.add_event(user, executor, "Art", time(18), time(19), date.today())
+        db_session.flush()
+
+
+def test_add_events_bulk_query_count(event_service, schedule, db_session, assert_queries):
+    """Ensures a batch costs two reads and one insert per table, not a query per item."""
+    user, executor = schedule
+    items = [
+        {"user": user, "executor": executor, "event_type": "Art", "start_time": time(18), "end_time": time(19),
+         "day": date.today() + timedelta(days=d)}
+        for d in range(1, 50)
+    ]
+    with assert_queries(3):
+        result = event_service.add_events_bulk(items)
+    assert len(result.created) == 49
+
+
+def test_cancel_and_move_event_query_count(event_service, schedule, db_session, assert_queries):
+    """Ensures cancelling or moving a loaded event only checks whether it is a series template."""
+    user, executor = schedule
+    event = db_session.query(Event).filter_by(executor_id=executor.id, start_time=time(8)).one()
+    with assert_queries(2):
+        event_service.cancel_event(event)
+        db_session.flush()
+    with assert_queries(1):
+        event_service.move_event(event, new_st=time(7), new_et=time(7, 45))
+        db_session.flush()
+
+
+@pytest.fixture
+def rescheduled(schedule, db_session):
+    """Two bookings: 8:00 moved twice, 9:00 moved once. Returns the versions of each, oldest first."""
+    user, executor = schedule
+    chains = []
+    for hour, moves in ((8, 2), (9, 1)):
+        versions = [db_session.query(Event).filter_by(executor_id=executor.id, start_time=time(hour)).one()]
+        for move in range(1, moves + 1):
+            replacement = EventRepo(db_session).new(
+                user, executor, "Lesson", time(hour), time(hour, 45), date.today() + timedelta(days=move)
+            )
+            db_session.flush()
+            versions[-1].reschedule_id, versions[-1].is_rescheduled = replacement.id, True
+            versions.append(replacement)
+        chains.append([event.id for event in versions])
+    db_session.commit()
+    db_session.expunge_all()
+    return chains
+
+
+def test_reschedule_chains_resolve_in_one_query(db_session, rescheduled, assert_queries):
+    """Ensures latest versions and histories of many chains take one query, from any version."""
+    first, second = rescheduled
+    repo = EventRepo(db_session)
+    with assert_queries(1):
+        latest = repo.latest_many([first[0], first[1], second[0], second[1]])
+    assert {ident: event.id for ident, event in latest.items()} == {
+        first[0]: first[2], first[1]: first[2], second[0]: second[1], second[1]: second[1]
+    }
+    with assert_queries(1):
+        histories = repo.history_many([first[1], second[0]])
+    assert {ident: [e.id for e in events] for ident, events in histories.items()} == {
+        first[1]: first, second[0]: second
+    }
+    assert [e.id for e in repo.history(first[2])] == first
+    assert repo.latest(-1) is None and repo.history(-1) == []
+
+
+def test_reschedule_walk_survives_bad_links(db_session, rescheduled):
+    """Ensures a chain pointing to a deleted event ends at its last event and a looping chain stops."""
+    first, second = rescheduled
+    repo = EventRepo(db_session)
+    db_session.get(Event, first[2]).reschedule_id = 10_000
+    db_session.get(Event, second[1]).reschedule_id = second[0]
+    db_session.commit()
+
+    assert repo.latest(first[0]).id == first[2]
+    assert [e.id for e in repo.history(first[0])] == first
+    assert repo.latest(second[0]) is not None
+    assert sorted(e.id for e in repo.history(second[0])) == sorted(second)
+
+
+def test_skip_rescheduled(event_service, schedule, rescheduled, assert_queries):
+    """Ensures superseded versions are filtered by the queries, not after them."""
+    user, executor = schedule
+    start = datetime.combine(date.today(), time.min)
+    with assert_queries(3):
+        rows = event_service.events_for_day(date.today(), executor, skip_rescheduled=True)
+    assert {row.start_time for row in rows if isinstance(row, Event)} == {time(10), time(11), time(12)}
+    assert len(event_service.events_for_day(date.today(), executor)) == 5 + 3
+    period = event_service.events_for_period(start, start + timedelta(days=3), executor, skip_rescheduled=True)
+    assert sorted(row.id for row in period if isinstance(row, Event)) == sorted(
+        [rescheduled[0][2], rescheduled[1][1]] + [row.id for row in rows if isinstance(row, Event)]
+    )
@@ -0,0 +1,124 @@
+from datetime import datetime, date, time, timedelta
+
+import pytest
+
+from src.repositories import EventRepo, RecurrentEventRepo
+
+SCHEDULE_TABLES = ("events", "recurrent_events", "event_breaks")
+
+
+def full_scans(db_session, statements):
+    """Runs EXPLAIN QUERY PLAN on every captured SELECT and returns the steps that scan a schedule table."""
+    scans = []
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith("SELECT"):
+            continue
+        connection = db_session.connection().connection.driver_connection
+        for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters):
+            detail = row[-1]
+            if detail.startswith("SCAN") and detail.split()[1] in SCHEDULE_TABLES:
+                scans.append((detail, statement))
+    return scans
+
+
+@pytest.fixture
+def booked(event_service, db_session, create_user_and_executor):
+    user, executor = create_user_and_executor(db_session, "Alice")
+    today = date.today()
+    EventRepo(db_session).new(user, executor, "Math", time(10, 0), time(11, 0), today)
+    RecurrentEventRepo(db_session).new(
+        user, executor, "Weekly Math", time(14, 0), time(15, 0), today, timedelta(days=7),
+        datetime.combine(today, time(14, 0)), datetime.combine(today, time(14, 0)) + timedelta(weeks=4),
+    )
+    db_session.commit()
+    return user, executor
+
+
+def test_events_for_day_uses_indexes(event_service, db_session, booked, sql_statements):
+    """Ensures events_for_day is served by index searches, with and without a user filter."""
+    user, executor = booked
+    event_service.events_for_day(date.today(), executor)
+    event_service.events_for_day(date.today(), executor, user)
+
+    assert sql_statements
+    assert full_scans(db_session, sql_statements) == []
+
+
+def test_events_for_period_uses_indexes(event_service, db_session, booked, sql_statements):
+    """Ensures events_for_period is served by index searches, with and without a user filter."""
+    user, executor = booked
+    start = datetime.combine(date.today(), time(0, 0))
+    event_service.events_for_period(start, start + timedelta(days=7), executor)
+    event_service.events_for_period(start, start + timedelta(days=7), executor, user)
+
+    assert sql_statements
+    assert full_scans(db_session, sql_statements) == []
+
+
+def test_booking_queries_use_indexes(event_service, db_session, booked, sql_statements, create_user_and_executor):
+    """Ensures the conflict check of add_event and available_slots don't scan the schedule tables."""
+    user, executor = booked
+    other_user, other_executor = create_user_and_executor(db_session, "Bob")
+    sql_statements.clear()
+    event_service.add_event(other_user, other_executor, "Art", time(16, 0), time(17, 0), date.today())
+    start = datetime.combine(date.today() + timedelta(days=1), time(9, 0))
+    event_service.available_slots(executor, start, start + timedelta(hours=3), timedelta(minutes=30))
+
+    assert sql_statements
+    assert full_scans(db_session, sql_statements) == []
+
+
+def test_schedule_bitmaps_use_indexes(event_service, db_session, booked, sql_statements):
+    """Ensures the bitmap build, which also reads the breaks of the executor's users, doesn't scan."""
+    user, executor = booked
+    event_service.schedule_bitmaps([executor], date.today(), 7)
+
+    assert sql_statements
+    assert full_scans(db_session, sql_statements) == []
+
+
+def test_common_free_slots_use_indexes(event_service, db_session, booked, sql_statements):
+    """Ensures the user-side lookups of common_free_slots are index searches as well."""
+    user, executor = booked
+    start = datetime.combine(date.today(), time(0, 0))
+    event_service.common_free_slots([executor, user], start, start + timedelta(days=7), timedelta(minutes=45))
+
+    assert sql_statements
+    assert full_scans(db_session, sql_statements) == []
+
+
+def test_event_pages_use_indexes(event_service, db_session, booked, sql_statements):
+    """Ensures later pages are found by keyset on an index, without scanning or sorting the events."""
+    user, executor = booked
+    start = datetime.combine(date.today(), time(0, 0))
+    page = event_service.events_page(start, start + timedelta(days=30), executor, limit=1)
+    sql_statements.clear()
+    event_service.events_page(start, start + timedelta(days=30), executor, limit=1, cursor=page.next_cursor)
+
+    assert sql_statements
+    assert full_scans(db_session, sql_statements) == []
+
+
+def searches(db_session, statements, table):
+    """Runs EXPLAIN QUERY PLAN on every captured SELECT and returns the index SEARCH steps on the given table."""
+    found = []
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith("SELECT"):
+            continue
+        connection = db_session.connection().connection.driver_connection
+        for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters):
+            if row[-1].startswith(f"SEARCH {table} ") and "PRIMARY KEY" not in row[-1]:
+                found.append(row[-1])
+    return found
+
+
+def test_event_overlap_searches_a_range(event_service, db_session, booked, sql_statements):
+    """Ensures period and availability reads bound start_at on both sides instead of reading all history."""
+    user, executor = booked
+    start = datetime.combine(date.today(), time(0, 0))
+    event_service.events_for_period(start, start + timedelta(days=7), executor)
+    event_service.available_slots(executor, start, start + timedelta(hours=12), timedelta(minutes=30))
+
+    plans = searches(db_session, sql_statements, "events")
+    assert plans
+    assert all("start_at>?" in plan and "start_at<?" in plan for plan in plans)
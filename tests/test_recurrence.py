@@ -0,0 +1,126 @@
+import random
+from datetime import datetime, date, time, timedelta
+
+from hypothesis import HealthCheck, assume, given, settings, strategies as st
+
+from src.models import RecurrentEvent, Event
+from src.recurrence import expand_occurrences, has_occurrence_between, has_occurrence_overlapping
+
+
+def naive_occurrences(series, start, end):
+    """Steps through every series one occurrence at a time."""
+    found = []
+    for i, s in enumerate(series):
+        occurrence = s.start
+        while occurrence < end and (s.end is None or occurrence <= s.end):
+            if occurrence + s.duration > start or (not s.duration and occurrence >= start):
+                found.append((i, occurrence, occurrence + s.duration))
+            if s.interval <= 0:
+                break
+            occurrence += timedelta(seconds=s.interval)
+    return found
+
+
+def make_series(rng):
+    anchor = datetime(2024, 1, 1) + timedelta(minutes=rng.randint(0, 60 * 24 * 60))
+    start_time = time(rng.randint(0, 22), rng.choice([0, 15, 30, 45]))
+    end_time = time(start_time.hour + rng.randint(0, 1), rng.choice([0, 15, 30, 45]))
+    if end_time < start_time:
+        end_time = start_time
+    end = None if rng.random() < 0.3 else anchor + timedelta(days=rng.randint(0, 120))
+    return RecurrentEvent(
+        start=anchor,
+        end=end,
+        interval=rng.choice([3600, 86400, 7 * 86400, 14 * 86400, 90 * 60, 0]),
+        event=Event(start_time=start_time, end_time=end_time, date=anchor.date()),
+    )
+
+
+def test_expand_occurrences_matches_naive_loop():
+    """Ensures the vectorized expansion finds exactly the occurrences of a plain loop."""
+    rng = random.Random(7)
+    for _ in range(100):
+        series = [make_series(rng) for _ in range(rng.randint(0, 20))]
+        start = datetime(2024, 1, 1) + timedelta(hours=rng.randint(0, 24 * 90))
+        end = start + timedelta(hours=rng.randint(0, 24 * 30))
+
+        index, starts, ends = expand_occurrences(series, start, end)
+        found = list(zip(index.tolist(), starts.tolist(), ends.tolist()))
+        assert found == naive_occurrences(series, start, end)
+
+
+def test_has_occurrence_overlapping_matches_naive_loop(db_session):
+    """Ensures the SQL filter selects exactly the series with an occurrence ending inside the window."""
+    rng = random.Random(11)
+    for _ in range(20):
+        series = [make_series(rng) for _ in range(rng.randint(1, 20))]
+        for s in series:
+            s.executor_id = s.event.executor_id = 1
+        start = datetime(2024, 1, 1) + timedelta(hours=rng.randint(0, 24 * 90))
+        end = start + timedelta(hours=rng.randint(0, 24 * 30))
+        db_session.add_all(series)
+        db_session.flush()
+        try:
+            selected = db_session.query(RecurrentEvent).join(RecurrentEvent.event).filter(
+                has_occurrence_overlapping(start, end)
+            ).all()
+            found = naive_occurrences(series, start, end)
+            assert set(selected) == {series[i] for i, _, occurrence_end in found if occurrence_end > start}
+        finally:
+            db_session.rollback()
+
+
+def test_expand_occurrences_weekly_lessons():
+    """Ensures a weekly series yields one occurrence per week inside the window."""
+    series = RecurrentEvent(
+        start=datetime(2024, 1, 1, 10), end=None, interval=7 * 86400,
+        event=Event(start_time=time(10), end_time=time(11), date=date(2024, 1, 1)),
+    )
+    _, starts, ends = expand_occurrences([series], datetime(2024, 1, 1), datetime(2024, 2, 1))
+    assert starts.tolist() == [datetime(2024, 1, d, 10) for d in (1, 8, 15, 22, 29)]
+    assert ends.tolist() == [datetime(2024, 1, d, 11) for d in (1, 8, 15, 22, 29)]
+
+
+def naive_next_occurrence(series, after, before):
+    """The first occurrence strictly after after, found by stepping from the start of the series."""
+    if after < series.start or not series.interval or series.interval <= 0:
+        return None
+    occurrence = series.start
+    while occurrence <= after:
+        occurrence += timedelta(seconds=series.interval)
+    if occurrence > before or (series.end is not None and occurrence > series.end):
+        return None
+    return occurrence
+
+
+moments = st.datetimes(min_value=datetime(2023, 1, 1), max_value=datetime(2025, 12, 31))
+series_strategy = st.builds(
+    RecurrentEvent,
+    start=moments,
+    interval=st.one_of(st.integers(1, 3 * 24 * 3600), st.sampled_from([3600, 24 * 3600, 7 * 24 * 3600]), st.just(0)),
+    end=st.one_of(st.none(), moments),
+)
+
+
+@settings(max_examples=300, deadline=None)
+@given(series=series_strategy, after=moments, span=st.timedeltas(timedelta(0), timedelta(days=3)))
+def test_get_next_occurrence_matches_stepping(series, after, span):
+    """Ensures get_next_occurrence agrees with stepping through the series one occurrence at a time."""
+    assume(series.interval == 0 or (after - series.start) / timedelta(seconds=series.interval) < 2_000)
+    assert series.get_next_occurrence(after, after + span) == naive_next_occurrence(series, after, after + span)
+
+
+@settings(max_examples=50, deadline=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
+@given(batch=st.lists(series_strategy, min_size=1, max_size=20), after=moments,
+       span=st.timedeltas(timedelta(0), timedelta(days=3)))
+def test_has_occurrence_between_matches_get_next_occurrence(db_session, batch, after, span):
+    """Ensures the SQL filter selects exactly the series get_next_occurrence finds an occurrence for."""
+    before = after + span
+    db_session.add_all(RecurrentEvent(executor_id=1, start=s.start, interval=s.interval, end=s.end) for s in batch)
+    db_session.flush()
+    try:
+        stored = db_session.query(RecurrentEvent).all()
+        selected = db_session.query(RecurrentEvent).filter(has_occurrence_between(after, before)).all()
+        assert set(selected) == {s for s in stored if s.get_next_occurrence(after, before) is not None}
+    finally:
+        db_session.rollback()
@@ -0,0 +1,92 @@
+import random
+import threading
+import time as clock
+from datetime import datetime, date, time
+
+import pytest
+from sqlalchemy import create_engine
+
+from src.availability import merge_intervals
+from src.database import make_engine, make_session_factory
+from src.models import Base, Event
+from src.service import EventService, SlotConflictError
+
+THREADS = 8
+ATTEMPTS = 25
+
+
+@pytest.fixture(params=["make_engine", "create_engine"])
+def sessions(request, tmp_path):
+    """Sessions on an engine from make_engine, and on a plain one whose driver begins transactions itself."""
+    url = f"sqlite:///{tmp_path / 'db.sqlite'}"
+    if request.param == "make_engine":
+        engine = make_engine(url, busy_timeout=30_000)
+    else:
+        engine = create_engine(url, connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    yield make_session_factory(engine)
+    engine.dispose()
+
+
+def test_reserve_event_conflict(sessions, create_user_and_executor):
+    """Ensures a reservation commits and a colliding one raises a typed error."""
+    with sessions() as session:
+        user, executor = create_user_and_executor(session, "Alice")
+    with sessions() as session:
+        EventService(session).reserve_event(user, executor, "Math", time(9), time(10), date.today())
+    with sessions() as session:
+        with pytest.raises(SlotConflictError):
+            EventService(session).reserve_event(user, executor, "Art", time(9, 30), time(10, 30), date.today())
+        assert session.query(Event).count() == 1
+
+
+def test_reserve_event_requires_fresh_transaction(sessions, create_user_and_executor):
+    """Ensures the atomic path refuses to join a transaction it can't lock up front."""
+    with sessions() as session:
+        user, executor = create_user_and_executor(session, "Alice")
+    with sessions() as session:
+        session.query(Event).count()
+        with pytest.raises(RuntimeError):
+            EventService(session).reserve_event(user, executor, "Math", time(9), time(10), date.today())
+
+
+def test_concurrent_reservations_never_double_book(sessions, create_user_and_executor, record_property):
+    """Ensures reservations from many threads for one executor never overlap."""
+    with sessions() as session:
+        user, executor = create_user_and_executor(session, "Alice")
+    booked, conflicts, errors = [], [], []
+
+    def client(seed):
+        rng = random.Random(seed)
+        for _ in range(ATTEMPTS):
+            start = rng.randrange(8 * 4, 19 * 4)
+            start_time = time(start // 4, start % 4 * 15)
+            end_time = time((start + 2) // 4, (start + 2) % 4 * 15)
+            try:
+                with sessions() as session:
+                    EventService(session).reserve_event(user, executor, "Lesson", start_time, end_time, date.today())
+                booked.append(start)
+            except SlotConflictError:
+                conflicts.append(start)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(THREADS)]
+    started = clock.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = clock.perf_counter() - started
+
+    assert errors == []
+    assert len(booked) + len(conflicts) == THREADS * ATTEMPTS
+    with sessions() as session:
+        intervals = [(datetime.combine(e.date, e.start_time), datetime.combine(e.date, e.end_time))
+                     for e in session.query(Event)]
+    assert len(intervals) == len(booked)
+    # Touching bookings stay separate, so any overlap would shrink the merged list
+    assert len(merge_intervals(intervals)) == len(intervals)
+    record_property("reservations_per_second", THREADS * ATTEMPTS / elapsed)
+    record_property("booked", len(booked))
+    record_property("conflicts", len(conflicts))
@@ -0,0 +1,104 @@
+from datetime import datetime, date, time, timedelta
+
+import pytest
+
+from src.models import Event, Executor, User
+from src.repositories import EventRepo
+from src.service import EventService, SlotConflictError
+from src.sharding import ShardRouter, ShardedEventService
+
+SHARDS = 3
+
+
+@pytest.fixture
+def router(tmp_path):
+    router = ShardRouter.sqlite_files(tmp_path, SHARDS)
+    router.init_db()
+    yield router
+    router.close()
+
+
+@pytest.fixture
+def sharded(router):
+    return ShardedEventService(router)
+
+
+def test_executor_ids_route_to_their_shard(router):
+    """Ensures new executors are spread round robin and land on the shard their id routes to."""
+    executors = [router.new_executor() for _ in range(2 * SHARDS)]
+    assert [router.shard_for(e.id) for e in executors] == [0, 1, 2, 0, 1, 2]
+    assert len({e.id for e in executors}) == len(executors)
+    for shard, factory in enumerate(router.session_factories):
+        with factory() as db:
+            assert all(router.shard_for(ident) == shard for ident, in db.query(Executor.id))
+    assert [e.id for e in router.executors()] == sorted(e.id for e in executors)
+
+
+def test_users_exist_on_every_shard(router):
+    """Ensures a user is copied to every shard under one id."""
+    user = router.new_user("Alice", "student")
+    for factory in router.session_factories:
+        with factory() as db:
+            assert db.get(User, user.id).name == "Alice"
+
+
+def test_writes_stay_on_the_executors_shard(router, sharded):
+    """Ensures bookings, cancellations and reads only touch the executor's shard."""
+    user = router.new_user("Alice", "student")
+    first, second = router.new_executor(0), router.new_executor(1)
+    event = sharded.add_event(user, first, "Math", time(9), time(10), date.today())
+    sharded.reserve_event(user, second, "Math", time(9), time(10), date.today())
+    with pytest.raises(SlotConflictError):
+        sharded.reserve_event(user, second, "Art", time(9, 30), time(10, 30), date.today())
+
+    counts = []
+    for factory in router.session_factories:
+        with factory() as db:
+            counts.append(db.query(Event).count())
+    assert counts == [1, 1, 0]
+    assert [e.event_type for e in sharded.events_for_day(date.today(), first)] == ["Math"]
+
+    sharded.cancel_event(event)
+    assert sharded.events_for_day(date.today(), first) == []
+    # The other shard's event with the same id is untouched
+    assert len(sharded.events_for_day(date.today(), second)) == 1
+
+
+def test_repositories_route_through_unit_of_work(router):
+    """Ensures a unit of work of an executor commits to its shard."""
+    user = router.new_user("Alice", "student")
+    executor = router.new_executor(2)
+    with router.unit_of_work(executor.id) as db:
+        EventRepo(db).new(user, executor, "Math", time(9), time(10), date.today())
+    with router.session(executor.id) as db:
+        assert db.query(Event).count() == 1
+
+
+def test_fan_out_matches_single_database(router, sharded, db_session):
+    """Ensures bulk booking and multi-executor availability over shards match one database."""
+    users = [router.new_user(f"User {i}", "student") for i in range(2)]
+    executors = [router.new_executor() for _ in range(5)]
+    for executor in executors:
+        db_session.add(Executor(id=executor.id))
+    for user in users:
+        db_session.add(User(id=user.id, name=user.name, role=user.role))
+    db_session.flush()
+
+    items = [
+        {
+            "user": users[i % 2], "executor": executors[i % 5], "event_type": "Lesson", "day": date.today(),
+            "start_time": time(9 + i // 5), "end_time": time(9 + i // 5, 45),
+        }
+        for i in range(20)
+    ]
+    # A collision inside the batch, on the shard of executors[1]
+    items.append({**items[1], "start_time": time(9, 30), "end_time": time(10)})
+    single = EventService(db_session)
+    expected = single.add_events_bulk(items)
+    result = sharded.add_events_bulk(items)
+    assert result.conflicts == expected.conflicts == {20: "Slot collides with another event of the batch"}
+    assert sorted(result.created) == sorted(expected.created)
+
+    start = datetime.combine(date.today(), time(8))
+    args = (start, start + timedelta(hours=10), timedelta(minutes=30))
+    assert sharded.available_slots_many(executors, *args) == single.available_slots_many(executors, *args)
@@ -0,0 +1,76 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from src.models import User, Event
+from src.repositories import EventRepo, RecurrentEventRepo
+from src.service import schedule_key
+
+
+@pytest.fixture
+def schedule(db_session, create_user_and_executor):
+    """Several events a day over three weeks, with equal start times, cancellations and a few series."""
+    user, executor = create_user_and_executor(db_session, "Alice")
+    other = User(name="Bob", role="student")
+    db_session.add(other)
+    db_session.flush()
+
+    first = date(2024, 3, 1)
+    for d in range(21):
+        day = first + timedelta(days=d)
+        for hour in (9, 11, 11, 14):
+            EventRepo(db_session).new(user if d % 2 else other, executor, "Lesson", time(hour), time(hour, 30), day)
+    db_session.query(Event).filter(Event.date == first + timedelta(days=3)).update({"cancelled": True})
+    for d in (2, 5, 5):
+        series_start = datetime.combine(first + timedelta(days=d), time(11))
+        RecurrentEventRepo(db_session).new(
+            user, executor, "Weekly", time(11), time(12), series_start.date(), timedelta(weeks=1),
+            series_start, series_start + timedelta(weeks=2),
+        )
+    db_session.commit()
+    return user, executor, datetime.combine(first, time.min)
+
+
+def test_stream_is_ordered_and_complete(event_service, schedule):
+    """Ensures the stream yields every row of the period once, in schedule order."""
+    user, executor, start = schedule
+    end = start + timedelta(days=30)
+    rows = list(event_service.iter_events_for_period(start, end, executor, batch_size=7))
+
+    keys = [schedule_key(row) for row in rows]
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+    # 21 days of 4 lessons, minus a cancelled day, plus the 3 series templates and the 3 series
+    assert len(rows) == 20 * 4 + 3 + 3
+
+
+def test_stream_clips_to_the_window(event_service, schedule):
+    """Ensures the stream only yields events overlapping the window."""
+    user, executor, start = schedule
+    window_start, window_end = start + timedelta(days=1, hours=11, minutes=15), start + timedelta(days=2, hours=9, minutes=1)
+    rows = [row for row in event_service.iter_events_for_period(window_start, window_end, executor) if isinstance(row, Event)]
+    assert [(row.date.day, row.start_time.hour) for row in rows] == [(2, 11), (2, 11), (2, 14), (3, 9)]
+
+
+def test_pages_follow_the_stream(event_service, schedule):
+    """Ensures paging through the period gives the same rows as the stream, for any page size."""
+    user, executor, start = schedule
+    end = start + timedelta(days=30)
+    for limit in (1, 5, 13, 200):
+        for owner in (None, user):
+            rows, cursor = [], None
+            while True:
+                page = event_service.events_page(start, end, executor, owner, limit=limit, cursor=cursor)
+                assert len(page.items) <= limit
+                rows += page.items
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+            assert rows == list(event_service.iter_events_for_period(start, end, executor, owner))
+
+
+def test_invalid_cursor(event_service, schedule):
+    """Ensures a malformed cursor raises ValueError."""
+    user, executor, start = schedule
+    with pytest.raises(ValueError):
+        event_service.events_page(start, start + timedelta(days=1), executor, cursor="not-a-cursor")